@@ -0,0 +1,121 @@
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.rules import action_terms, keywords
+
+berlin_districts = [
+    "Mitte", "Friedrichshain-Kreuzberg", "Pankow", "Charlottenburg-Wilmersdorf", "Spandau",
+    "Steglitz-Zehlendorf", "Tempelhof-Schöneberg", "Neukölln", "Treptow-Köpenick",
+    "Marzahn-Hellersdorf", "Lichtenberg", "Reinickendorf",
+]
+brandenburg_places = [
+    ("Potsdam", "Potsdam"), ("Cottbus", "Cottbus"), ("Frankfurt (Oder)", "Frankfurt (Oder)"),
+    ("Bernau", "Barnim"), ("Eberswalde", "Barnim"), ("Königs Wusterhausen", "Dahme-Spreewald"),
+    ("Erkner", "Oder-Spree"), ("Fürstenwalde", "Oder-Spree"), ("Jüterbog", "Teltow-Fläming"),
+    ("Prenzlau", "Uckermark"), ("Neuruppin", "Ostprignitz-Ruppin"), ("Rathenow", "Havelland"),
+]
+streets = ["Hauptstraße", "Bahnhofstraße", "Karl-Marx-Allee", "Lindenweg", "Am Markt", "Schillerstraße"]
+people = ["ein Mann", "eine Frau", "ein Jugendlicher", "eine Jugendliche", "ein Mädchen", "ein Junge"]
+titles = [
+    "Einbruch in {place}", "Verkehrsunfall auf der {street}", "Festnahme nach {action}",
+    "Zeugenaufruf nach Vorfall in {place}", "Polizeieinsatz in der {street}", "Sachbeschädigung in {place}",
+]
+filler = [
+    "Die Polizei wurde gegen {time} Uhr in die {street} alarmiert.",
+    "Nach bisherigen Erkenntnissen hielt sich {person} im Bereich eines Supermarktes auf.",
+    "Einsatzkräfte nahmen {person} im Alter von {age} Jahren vorläufig fest.",
+    "Der {age}-jährige Tatverdächtige wurde nach der Feststellung seiner Personalien entlassen.",
+    "Rettungskräfte brachten die verletzte Person zur ambulanten Behandlung in ein Krankenhaus.",
+    "Die Ermittlungen dauern an und werden von der zuständigen Kriminalpolizei geführt.",
+    "Zeugen, die Angaben zum Geschehen machen können, werden gebeten, sich bei der Polizei zu melden.",
+    "Am Tatort wurden Spuren gesichert und mehrere Anwohnende befragt.",
+    "Ein Sachschaden von etwa {amount} Euro ist entstanden.",
+    "Die Fahrbahn war für die Dauer der Unfallaufnahme bis etwa {time} Uhr gesperrt.",
+]
+keyword_sentences = [
+    "Dabei äußerte {person} {keyword} Parolen.",
+    "Die Ermittlungen wegen {keyword} Äußerungen übernahm der Polizeiliche Staatsschutz.",
+    "An einer Hauswand wurde ein Schriftzug mit Bezug zu {keyword} entdeckt.",
+    "Der Staatsschutz prüft einen Zusammenhang mit {keyword}.",
+]
+action_sentences = [
+    "Es kam zu einer {action} zum Nachteil eines Passanten.",
+    "Die Polizei ermittelt wegen {action}.",
+    "Im Anschluss an die {action} flüchtete die tatverdächtige Person.",
+]
+# Inflected endings, so fuzzy matching sees the same spread of forms as in real reports.
+endings = ["", "", "e", "en", "er", "es"]
+
+
+def _fill(template, rng, **values):
+    values.setdefault("person", rng.choice(people))
+    values.setdefault("street", rng.choice(streets))
+    values.setdefault("time", f"{rng.randint(0, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}")
+    values.setdefault("age", rng.randint(14, 80))
+    values.setdefault("amount", rng.randint(2, 90) * 100)
+    values.setdefault("place", rng.choice(brandenburg_places)[0])
+    values.setdefault("action", rng.choice(action_terms))
+    return template.format(**values)
+
+
+def generate(count, keyword_density=0.05, action_density=0.3, seed=1, start=datetime.date(2016, 1, 1)):
+    """Yields count synthetic press releases as Title, Date, Location, Text, URL rows.
+
+    keyword_density is the share of documents mentioning at least one keyword
+    (in an inflected form), action_density the share mentioning an action
+    term. The same seed always gives the same corpus.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        date = start + datetime.timedelta(days=i * 3650 // max(count, 1))
+        berlin = i % 2 == 0
+        if berlin:
+            location = rng.choice(berlin_districts)
+            url = f"https://www.berlin.de/polizei/polizeimeldungen/{date.year}/pressemitteilung.{100000 + i}.php"
+        else:
+            place, district = rng.choice(brandenburg_places)
+            location = f"{place}, {district}"
+            url = f"https://polizei.brandenburg.de/pressemeldung/synthetisch-{i}/{5000000 + i}"
+
+        sentences = [_fill(rng.choice(filler), rng) for _ in range(rng.randint(4, 12))]
+        if rng.random() < keyword_density:
+            keyword = rng.choice(keywords) + rng.choice(endings)
+            sentences.insert(rng.randrange(len(sentences) + 1),
+                             _fill(rng.choice(keyword_sentences), rng, keyword=keyword))
+        if rng.random() < action_density:
+            sentences.insert(rng.randrange(len(sentences) + 1), _fill(rng.choice(action_sentences), rng))
+
+        yield {
+            "Title": _fill(rng.choice(titles), rng),
+            "Date": date.strftime("%d.%m.%Y"),
+            "Location": location,
+            "Text": f"Nr. {i}\n" + "\n".join(sentences),
+            "URL": url,
+        }
+
+
+def write_corpus(path, count, keyword_density=0.05, seed=1):
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Title", "Date", "Location", "Text", "URL"], lineterminator="\r\n")
+        writer.writeheader()
+        writer.writerows(generate(count, keyword_density, seed=seed))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic press-release corpus as CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--keyword-density", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    write_corpus(args.path, args.docs, args.keyword_density, args.seed)
+    print(f"Wrote {args.docs} documents to {args.path}")
@@ -0,0 +1,134 @@
+import os
+import sys
+from html import escape
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Both sites wrap a few KB of content in a lot of navigation, scripts and
+# footer markup; the chrome below stands in for that so parse costs are realistic.
+_head = "".join(
+    f'<link rel="stylesheet" href="/assets/css/site-{i}.css"><script src="/assets/js/bundle-{i}.js"></script>'
+    for i in range(20)
+)
+_nav = "<nav><ul>" + "".join(
+    f'<li class="nav-item"><a class="nav-link" href="/rubrik/{i}/">Rubrik {i}</a>'
+    f'<ul>{"".join(f"<li><a href=/rubrik/{i}/{j}/>Unterseite {j}</a></li>" for j in range(8))}</ul></li>'
+    for i in range(25)
+) + "</ul></nav>"
+_footer = "<footer><div class=\"footer\">" + "".join(
+    f'<div class="col"><h3>Service {i}</h3><ul>{"".join(f"<li><a href=/service/{i}/{j}>Link {j}</a></li>" for j in range(10))}</ul></div>'
+    for i in range(6)
+) + "</div><script>window.dataLayer=window.dataLayer||[];</script></footer>"
+
+
+def _page(title, body):
+    return (
+        f'<!DOCTYPE html><html lang="de"><head><meta charset="utf-8"><title>{escape(title)}</title>{_head}</head>'
+        f'<body><header class="site-header">{_nav}</header><main id="layout-grid">{body}</main>{_footer}</body></html>'
+    )
+
+
+def _paragraphs(text):
+    return "".join(f"<p>{escape(line)}</p>" for line in text.split("\n") if line.strip())
+
+
+def berlin_article_page(title, location, text, number=1):
+    body = (
+        f'<div class="column-content"><h1 class="title">{escape(title)}</h1>'
+        f'<div class="polizeimeldung">Polizeimeldung vom {number}</div>'
+        f'<p class="polizeimeldung" title="Ereignisort">{escape(location)}</p>'
+        f'<div class="textile">{_paragraphs(text)}</div></div>'
+    )
+    return _page(f"{title} - Berlin.de", body)
+
+
+def berlin_listing_page(items):
+    """items: dicts with href, title, date (dd.mm.yyyy) and location."""
+    rows = "".join(
+        f'<li class="row-fluid"><div class="cell nowrap date">{item["date"]} 10:00 Uhr</div>'
+        f'<div class="cell text"><a href="{escape(item["href"])}">{escape(item["title"])}</a>'
+        f'<span class="category">Ereignisort: {escape(item["location"])}</span></div></li>'
+        for item in items
+    )
+    return _page("Polizeimeldungen Archiv - Berlin.de", f'<ul class="list--tablelist">{rows}</ul>')
+
+
+def brandenburg_article_page(title, ort, landkreis, text):
+    body = (
+        f'<article><h1>{escape(title)}</h1><p class="pbb-ort">{escape(ort)}</p>'
+        f'<p class="pbb-landkreis">{escape(landkreis)}</p>'
+        f'<div class="pbb-article-text">{_paragraphs(text)}</div></article>'
+    )
+    return _page(f"{title} | Polizei Brandenburg", body)
+
+
+def brandenburg_listing_page(items):
+    """items: dicts with href, title and date (dd.mm.yyyy)."""
+    rows = "".join(
+        f'<li><h4><a href="{escape(item["href"])}"><strong>{escape(item["title"])}</strong></a></h4>'
+        f'<p><span class="pbb-date">Artikel vom {item["date"]}</span> Kriminalität</p></li>'
+        for item in items
+    )
+    return _page("Suche | Polizei Brandenburg", f'<ul class="pbb-searchlist list-unstyled">{rows}</ul>')
+
+
+def rss_feed(title, items):
+    """items: dicts with link, title, date (dd.mm.yyyy) and summary, newest first."""
+    entries = "".join(
+        f"<item><title>{escape(item['title'])}</title><link>{escape(item['link'])}</link>"
+        f"<guid>{escape(item['link'])}</guid>"
+        f"<pubDate>{_rfc822(item['date'])}</pubDate>"
+        f"<description>{escape(item['summary'])}</description></item>"
+        for item in items
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(title)}</title><link>https://example.invalid/</link>{entries}</channel></rss>"
+    )
+
+
+def _rfc822(date):
+    day, month, year = date.split(".")
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    return f"{day} {months[int(month) - 1]} {year} 10:00:00 +0100"
+
+
+def write_fixtures(rss_csv, brandenburg_csv):
+    """Renders one saved page per type from real rows of the scraped CSVs."""
+    import pandas as pd
+
+    rss = pd.read_csv(rss_csv).fillna("")
+    berlin = rss[rss["URL"].str.contains("berlin.de")].head(10)
+    brandenburg = pd.read_csv(brandenburg_csv).fillna("").head(10)
+    first_berlin = berlin.iloc[0]
+    first_brandenburg = brandenburg.iloc[0]
+    ort, _, landkreis = first_brandenburg["Location"].partition(", ")
+
+    pages = {
+        "berlin_article": berlin_article_page(
+            first_berlin["Title"], first_berlin["Location"], first_berlin["Text"]
+        ),
+        "berlin_listing": berlin_listing_page([
+            {"href": row.URL.replace("https://www.berlin.de", ""), "title": row.Title,
+             "date": row.Date, "location": row.Location}
+            for row in berlin.itertuples()
+        ]),
+        "brandenburg_article": brandenburg_article_page(
+            first_brandenburg["Title"], ort, landkreis, first_brandenburg["Text"]
+        ),
+        "brandenburg_listing": brandenburg_listing_page([
+            {"href": row.URL.replace("https://polizei.brandenburg.de", ""), "title": row.Title,
+             "date": row.Date}
+            for row in brandenburg.itertuples()
+        ]),
+    }
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for name, html in pages.items():
+        with open(os.path.join(fixtures_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+    return sorted(pages)
+
+
+if __name__ == "__main__":
+    # python bench/pages.py rss/data/police_rss.csv historical/data/brandenburg_police_results.csv
+    print("Wrote", ", ".join(write_fixtures(sys.argv[1], sys.argv[2])))
@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bs4 import BeautifulSoup
+
+from bench.pages import fixtures_dir
+from common.extractors import extractors, parser
+
+
+def cpu_ms_per_page(fn, html, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(html)
+    return (time.process_time() - start) * 1000 / repeat
+
+
+def main(repeat=50):
+    mismatches = 0
+    print(f"Targeted parser backend: {parser}")
+    print(f"{'page':<22}{'full html.parser':>18}{'targeted':>12}{'speedup':>10}")
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name not in extractors:
+            continue
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        targeted, from_soup = extractors[name]
+
+        def full(page):
+            return from_soup(BeautifulSoup(page, "html.parser"))
+
+        if full(html) != targeted(html):
+            print(f"❌ {name}: targeted extraction differs from the full parse")
+            mismatches += 1
+            continue
+        before = cpu_ms_per_page(full, html, repeat)
+        after = cpu_ms_per_page(targeted, html, repeat)
+        print(f"{name:<22}{before:>15.2f} ms{after:>9.2f} ms{before / after:>9.1f}x")
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python bench/parsing.py [repeat]
+    sys.exit(1 if main(*map(int, sys.argv[1:])) else 0)
@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.corpus import generate, write_corpus
+from bench.server import replay_process
+from common.bodyqueue import BodyQueue
+from common.checkpoint import Checkpoint
+from common.extract import extract_batches
+from common.extractors import berlin_article, brandenburg_article
+from common.feeds import poll_feed
+from common.fetch import HostLimiter, fetch_all, make_session, polite_get
+from common.report import RunReport
+from common.rules import diff_threshold, term_groups
+from common.store import ArticleStore
+from common.stream import read_batches
+from historical import berlin, brandenburg
+
+results_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+
+def bench_analysis(docs, keyword_density, workers, batch_size):
+    """documents/s of the historical analysis loop (read, analyse, no output) over a synthetic CSV."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_corpus(os.path.join(tmp, "corpus.csv"), docs, keyword_density)
+        start = time.perf_counter()
+        related = 0
+        for _, columns in extract_batches(
+            read_batches([path], batch_size), term_groups, diff_threshold, workers
+        ):
+            related += int(columns["RightWingRelated"].sum())
+        elapsed = time.perf_counter() - start
+    return {"docs": docs, "related": related, "seconds": elapsed, "docs_per_s": docs / elapsed}
+
+
+# The scrapers run against the replay server without their politeness delays,
+# so the numbers measure fetching, parsing and saving only. The RSS loop
+# mirrors rss/rss.py; the historical scrapers run their own crawl functions.
+
+def bench_rss(url, workers):
+    session = make_session(pool_size=workers)
+    limiter = HostLimiter(min_interval=0, max_concurrent=workers)
+    feeds = [f"{url}/berlin/rss", f"{url}/brandenburg/rss"]
+    start = time.perf_counter()
+    polls = fetch_all(feeds, lambda url: poll_feed(session, limiter, url, {}), max_workers=workers)
+    pending = [
+        (urljoin(url, entry.get("link")), "berlin" in feed)
+        for feed, (entries, _) in zip(feeds, polls) for entry in entries
+    ]
+
+    def scrape(item):
+        url, is_berlin = item
+        res = polite_get(session, limiter, url)
+        return (berlin_article if is_berlin else brandenburg_article)(res.text)
+
+    bodies = fetch_all(pending, scrape, max_workers=workers)
+    return len(feeds) + len(bodies), time.perf_counter() - start
+
+
+def _crawl(run):
+    """Runs one scraper phase with its progress output silenced."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        return run()
+
+
+def bench_berlin(url, years, workers):
+    """Both phases of historical/berlin.py against the replay server, into a fresh store and queue."""
+    session = make_session(pool_size=workers)
+    limiter = HostLimiter(min_interval=0, max_concurrent=workers)
+    report = RunReport("bench-berlin")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArticleStore(os.path.join(tmp, "articles.sqlite"), os.path.join(tmp, "berlin.csv"), table="berlin")
+        queue = BodyQueue(os.path.join(tmp, "queue.sqlite"), table="berlin")
+        checkpoint = Checkpoint(os.path.join(tmp, "checkpoint.json"))
+        start = time.perf_counter()
+        _crawl(lambda: berlin.crawl_listings(
+            session, limiter, store, queue, checkpoint, report, base=url, years=years, workers=workers
+        ))
+        _crawl(lambda: berlin.fetch_bodies(session, limiter, store, queue, report, workers=workers))
+        elapsed = time.perf_counter() - start
+        queue.close()
+        store.close()
+    return _pages(report), elapsed
+
+
+def bench_brandenburg(url):
+    """Both phases of historical/brandenburg.py against the replay server, back to its max_date."""
+    session = make_session()
+    limiter = HostLimiter(min_interval=0, max_concurrent=1)
+    report = RunReport("bench-brandenburg")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArticleStore(
+            os.path.join(tmp, "articles.sqlite"), os.path.join(tmp, "brandenburg.csv"), table="brandenburg"
+        )
+        queue = BodyQueue(os.path.join(tmp, "queue.sqlite"), table="brandenburg")
+        start = time.perf_counter()
+        _crawl(lambda: brandenburg.crawl_listings(session, store, queue, report, base=url, interval=0))
+        _crawl(lambda: brandenburg.fetch_bodies(session, limiter, store, queue, report))
+        elapsed = time.perf_counter() - start
+        queue.close()
+        store.close()
+    return _pages(report), elapsed
+
+
+def _pages(report):
+    counters = report.counters
+    return counters["listing_pages"] + counters["bodies_fetched"] + counters["bodies_failed"]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _previous(params):
+    if not os.path.exists(results_path):
+        return None
+    previous = None
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            run = json.loads(line)
+            if run["params"] == params:
+                previous = run
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure analysis and scraper throughput.")
+    parser.add_argument("--docs", type=int, default=100000, help="synthetic documents to analyse")
+    parser.add_argument("--keyword-density", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="analysis processes")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--site-docs", type=int, default=2000, help="articles served by the replay server")
+    parser.add_argument("--latency-ms", type=float, default=20, help="replay server delay per response")
+    parser.add_argument("--skip", action="append", default=[], choices=["analysis", "rss", "berlin", "brandenburg"])
+    parser.add_argument("--no-save", action="store_true", help=f"don't append the run to {results_path}")
+    args = parser.parse_args()
+
+    params = {k: v for k, v in vars(args).items() if k not in ("skip", "no_save")}
+    results = {}
+
+    if "analysis" not in args.skip:
+        print(f"Analysing {args.docs} synthetic documents with {args.workers} workers...")
+        results["analysis"] = bench_analysis(args.docs, args.keyword_density, args.workers, args.batch_size)
+
+    rows = list(generate(args.site_docs, args.keyword_density))
+    years = sorted({int(row["Date"][-4:]) for row in rows if "berlin.de" in row["URL"]})
+    scrapers = {
+        "rss": lambda url: bench_rss(url, workers=8),
+        "berlin": lambda url: bench_berlin(url, years, workers=4),
+        "brandenburg": bench_brandenburg,
+    }
+    for name, run in scrapers.items():
+        if name in args.skip:
+            continue
+        print(f"Scraping the replay server like {name} ({args.latency_ms:g} ms latency)...")
+        with replay_process(args.site_docs, args.keyword_density, args.latency_ms / 1000) as url:
+            pages, elapsed = run(url)
+        results[name] = {"pages": pages, "seconds": elapsed, "pages_per_s": pages / elapsed}
+
+    previous = _previous(params)
+    print(f"\n{'benchmark':<14}{'throughput':>20}{'previous':>14}{'change':>10}")
+    for name, result in results.items():
+        metric = "docs_per_s" if "docs_per_s" in result else "pages_per_s"
+        unit = "docs/s" if metric == "docs_per_s" else "pages/s"
+        line = f"{name:<14}{result[metric]:>12.1f} {unit:<7}"
+        before = (previous or {}).get("results", {}).get(name, {}).get(metric)
+        if before:
+            line += f"{before:>14.1f}{(result[metric] / before - 1) * 100:>+9.1f}%"
+        print(line)
+
+    if not args.no_save:
+        run = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "params": params,
+            "results": results,
+        }
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, sort_keys=True) + "\n")
+        print(f"\nSaved to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench.corpus import generate
+from bench.pages import (
+    berlin_article_page, berlin_listing_page, brandenburg_article_page, brandenburg_listing_page, rss_feed,
+)
+
+page_size = 10
+feed_size = 50
+search_prefix = ["suche", "typ", "null", "kategorie", "Kriminalit%C3%A4t"]
+
+
+class ReplaySite:
+    """Renders a synthetic corpus as Berlin and Brandenburg RSS, listing and article pages.
+
+    Paths (relative to the server root):
+        /berlin/rss, /brandenburg/rss                 newest feed_size articles
+        /polizei/polizeimeldungen/archiv/<year>/?page_at_1_0=<page>
+                                                      Berlin archive listing, newest first
+        /suche/typ/null/kategorie/Kriminalit%C3%A4t/<page>/1
+                                                      Brandenburg search listing, newest first
+        /berlin/article/<n>, /brandenburg/article/<n> article pages
+    The listings use the sites' own paths, so historical/berlin.py and
+    brandenburg.py can crawl the server with only their base URL changed.
+    Listings past the last article render an empty result list.
+    """
+
+    def __init__(self, rows):
+        self.articles = {"berlin": [], "brandenburg": []}
+        for row in rows:
+            site = "berlin" if "berlin.de" in row["URL"] else "brandenburg"
+            self.articles[site].append(row)
+        for site in self.articles:
+            self.articles[site].reverse()
+        self.by_year = {}
+        for n, row in enumerate(self.articles["berlin"]):
+            self.by_year.setdefault(row["Date"][-4:], []).append(n)
+
+    def article_path(self, site, n):
+        return f"/{site}/article/{n}"
+
+    def render(self, path, query):
+        """Returns (status, content type, body) for a request path."""
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[1] == "rss" and parts[0] in self.articles:
+            site = parts[0]
+            items = [
+                {"link": self.article_path(site, n), "title": row["Title"], "date": row["Date"],
+                 "summary": row["Text"][:200]}
+                for n, row in enumerate(self.articles[site][:feed_size])
+            ]
+            return 200, "application/rss+xml; charset=utf-8", rss_feed(f"Polizei {site}", items)
+        if len(parts) == 3 and parts[1] == "article" and parts[0] in self.articles and parts[2].isdigit():
+            n = int(parts[2])
+            rows = self.articles[parts[0]]
+            if n >= len(rows):
+                return 404, "text/plain", "not found"
+            row = rows[n]
+            if parts[0] == "berlin":
+                html = berlin_article_page(row["Title"], row["Location"], row["Text"], n)
+            else:
+                ort, _, landkreis = row["Location"].partition(", ")
+                html = brandenburg_article_page(row["Title"], ort, landkreis, row["Text"])
+            return 200, "text/html; charset=utf-8", html
+        if len(parts) == 4 and parts[:3] == ["polizei", "polizeimeldungen", "archiv"]:
+            page = int(query.get("page_at_1_0", ["1"])[0])
+            numbers = self.by_year.get(parts[3], [])[(page - 1) * page_size:page * page_size]
+            items = [
+                {"href": self.article_path("berlin", n), "title": self.articles["berlin"][n]["Title"],
+                 "date": self.articles["berlin"][n]["Date"], "location": self.articles["berlin"][n]["Location"]}
+                for n in numbers
+            ]
+            return 200, "text/html; charset=utf-8", berlin_listing_page(items)
+        if len(parts) == 7 and parts[:5] == search_prefix and parts[5].isdigit():
+            page = int(parts[5])
+            rows = self.articles["brandenburg"]
+            items = [
+                {"href": self.article_path("brandenburg", n), "title": rows[n]["Title"], "date": rows[n]["Date"]}
+                for n in range((page - 1) * page_size, min(page * page_size, len(rows)))
+            ]
+            return 200, "text/html; charset=utf-8", brandenburg_listing_page(items)
+        if path == "/robots.txt":
+            return 200, "text/plain", "User-agent: *\nAllow: /\n"
+        return 404, "text/plain", "not found"
+
+
+class ReplayServer:
+    """Serves a ReplaySite on localhost with a fixed delay per response.
+
+    Use as a context manager; `url` is the server root and `requests` /
+    `bytes_sent` count what was served.
+    """
+
+    def __init__(self, site, latency=0.0, port=0):
+        self.site = site
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                status, content_type, body = server.site.render(url.path, parse_qs(url.query))
+                data = body.encode("utf-8")
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_sent += len(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve(docs, keyword_density, latency, queue):
+    with ReplayServer(ReplaySite(generate(docs, keyword_density)), latency) as server:
+        queue.put(server.url)
+        while True:
+            time.sleep(3600)
+
+
+@contextlib.contextmanager
+def replay_process(docs, keyword_density=0.05, latency=0.0):
+    """Runs a ReplayServer over generate(docs) in a child process and yields its URL.
+
+    Keeps page rendering off the benchmarked process, so it does not compete
+    with the scraper threads for the GIL.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(docs, keyword_density, latency, queue), daemon=True)
+    process.start()
+    try:
+        yield queue.get(timeout=60)
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic corpus as Berlin/Brandenburg pages.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    with ReplayServer(ReplaySite(generate(args.docs)), args.latency_ms / 1000, args.port) as server:
+        print(f"Serving {args.docs} articles at {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,150 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from common.fetch import fetch_all
+from common.matching import TermMatcher
+from common.rules import diff_threshold, term_groups
+
+max_attempts = 3
+
+_matcher = None
+
+
+def title_priority(title):
+    """2 if the title hits a keyword (exactly or fuzzily), 1 if it only hits an action term, else 0."""
+    global _matcher
+    if _matcher is None:
+        _matcher = TermMatcher(term_groups, diff_threshold)
+    scan = _matcher.scan((title or "").lower())
+    if scan.hits("keywords"):
+        return 2
+    if scan.hits("actions"):
+        return 1
+    return 0
+
+
+def _iso_date(value):
+    try:
+        return datetime.datetime.strptime(value, "%d.%m.%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return ""
+
+
+class BodyQueue:
+    """Articles found on listing pages whose body is still to be fetched, persisted in SQLite.
+
+    Items are taken best first: titles with keyword hits, then action hits,
+    then the rest, newest first within each. A fetched article leaves the
+    queue. A failed one is not taken again in the same run, so it is retried
+    by the next one, up to max_attempts runs. After that it no longer counts
+    as queued, and adding it again (a listing page still shows it) requeues
+    it. Safe to share between threads.
+    """
+
+    def __init__(self, path, table="queue"):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self._failed = set()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (url TEXT PRIMARY KEY, title TEXT, date TEXT, "
+            "location TEXT, day TEXT, priority INTEGER, attempts INTEGER DEFAULT 0)"
+        )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_order ON {table} (priority DESC, day DESC)"
+        )
+        self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE attempts < ?", (max_attempts,)
+            ).fetchone()[0]
+
+    def __contains__(self, url):
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT 1 FROM {self.table} WHERE url = ? AND attempts < ?", (url, max_attempts)
+            ).fetchone() is not None
+
+    def add(self, items):
+        """Queues listing items (Title, Date, Location, URL); returns how many were new or requeued."""
+        rows = [
+            (item["URL"], item["Title"], item["Date"], item.get("Location") or "",
+             _iso_date(item["Date"]), title_priority(item["Title"]))
+            for item in items
+        ]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT INTO {self.table} (url, title, date, location, day, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (url) DO UPDATE SET attempts = 0 WHERE attempts >= {max_attempts}",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def take(self, limit):
+        """Up to limit items best first, skipping the ones that failed in this run."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT url, title, date, location, priority FROM {self.table} WHERE attempts < ? "
+                "ORDER BY priority DESC, day DESC, attempts LIMIT ?",
+                (max_attempts, limit + len(self._failed)),
+            ).fetchall()
+            rows = [row for row in rows if row[0] not in self._failed][:limit]
+        return [
+            {"URL": url, "Title": title, "Date": date, "Location": location, "Priority": priority}
+            for url, title, date, location, priority in rows
+        ]
+
+    def done(self, urls):
+        with self._lock, self.conn:
+            self.conn.executemany(f"DELETE FROM {self.table} WHERE url = ?", ((url,) for url in urls))
+
+    def failed(self, url):
+        with self._lock, self.conn:
+            self.conn.execute(f"UPDATE {self.table} SET attempts = attempts + 1 WHERE url = ?", (url,))
+            self._failed.add(url)
+
+    def close(self):
+        self.conn.close()
+
+
+def drain(queue, fetch_body, store, workers=1, batch_size=20, report=None):
+    """Fetches queued bodies best first and saves every batch to store; returns rows saved.
+
+    fetch_body(item) returns (text, location) or None on failure. The listing
+    location wins over the one found on the article page.
+    """
+    saved = 0
+    while True:
+        items = queue.take(batch_size)
+        if not items:
+            return saved
+        results = fetch_all(items, fetch_body, max_workers=workers)
+        rows = []
+        for item, result in zip(items, results):
+            if result is None:
+                queue.failed(item["URL"])
+                continue
+            text, location = result
+            print(f"📍 {item['Location'] or location} – {item['Date']} – {item['Title']}")
+            rows.append({
+                "Title": item["Title"],
+                "Date": item["Date"],
+                "Location": item["Location"] or location,
+                "Text": text,
+                "URL": item["URL"]
+            })
+        saved += store.save(rows)
+        queue.done(row["URL"] for row in rows)
+        if report is not None:
+            report.count("bodies_fetched", len(rows))
+            report.count("bodies_failed", len(items) - len(rows))
+            report.count("keyword_titles_fetched", sum(1 for item in items if item["Priority"] == 2))
@@ -0,0 +1,33 @@
+import time
+
+
+class TimeBudget:
+    """Wall-clock allowance for one run, counted from construction.
+
+    Stages check `expired()` between units of work (a batch of feeds, articles
+    or rows), so the unit in progress is always finished. Without a limit it
+    never expires.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def from_minutes(cls, minutes):
+        return cls(None if minutes is None else minutes * 60)
+
+    @property
+    def limited(self):
+        return self.deadline is not None
+
+    def remaining(self):
+        if self.deadline is None:
+            return float("inf")
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "expired": self.limited and self.expired()}
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from common.matching import TermMatcher, token_regex
+from common.rules import age_regex, date_regex, gender_regex, time_regex
+
+cache_version = 1
+# Bump when the detail columns are built differently, e.g. the highlight spans.
+details_version = 2
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def rules_hash(threshold):
+    # Anything that changes how a single term is evaluated invalidates every cached term.
+    rules = {
+        "version": cache_version,
+        "threshold": threshold,
+        "token": token_regex.pattern,
+    }
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def details_hash():
+    # The extraction regexes only feed the detail columns; a change re-extracts
+    # them for every row without scanning for terms again.
+    details = {
+        "version": details_version,
+        "patterns": [(regex.pattern, regex.flags) for regex in (time_regex, date_regex, age_regex, gender_regex)],
+    }
+    return hashlib.sha1(json.dumps(details, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Per-article term results keyed by URL, text hash and rule-set hash.
+
+    Results are stored per term, so editing the keyword or action lists only
+    evaluates the added terms against each article, and removed terms are
+    dropped from the stored results. Articles whose text or rule-set hash
+    changed are evaluated in full. When the extraction regexes change
+    (details hash), every article is reported as recomputed from its stored
+    terms, so its detail columns are rebuilt.
+    """
+
+    def __init__(self, path, threshold):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "url TEXT PRIMARY KEY, text_hash TEXT, rules_hash TEXT, evaluated TEXT, forms TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(analysis)")}
+        if "details_hash" not in columns:
+            self.conn.execute("ALTER TABLE analysis ADD COLUMN details_hash TEXT")
+        self.conn.commit()
+        self.threshold = threshold
+        self.rules_hash = rules_hash(threshold)
+        self.details_hash = details_hash()
+        self._matchers = {}
+        self._pending = []
+        self.stats = {"cached": 0, "details": 0, "partial": 0, "full": 0}
+
+    def _matcher(self, lows):
+        key = tuple(sorted(lows))
+        if key not in self._matchers:
+            self._matchers[key] = TermMatcher({"terms": key}, self.threshold)
+        return self._matchers[key]
+
+    def forms(self, url, text, lows):
+        """Returns ({low: surface forms} for lows, whether the row changed).
+
+        A row changed if any term was scanned or dropped, or its detail
+        columns are out of date.
+        """
+        digest = text_hash(text)
+        row = None
+        if isinstance(url, str):
+            row = self.conn.execute(
+                "SELECT text_hash, rules_hash, evaluated, forms, details_hash FROM analysis WHERE url = ?", (url,)
+            ).fetchone()
+        stale = set()
+        if row and row[0] == digest and row[1] == self.rules_hash:
+            evaluated = set(json.loads(row[2]))
+            cached = json.loads(row[3])
+            missing = [low for low in lows if low not in evaluated]
+            stale = evaluated.difference(lows)
+            evaluated -= stale
+            cached = {low: found for low, found in cached.items() if low not in stale}
+            details_changed = row[4] != self.details_hash
+        else:
+            evaluated = set()
+            cached = {}
+            missing = list(lows)
+            details_changed = True
+
+        changed = bool(missing or stale or details_changed)
+        if not changed:
+            self.stats["cached"] += 1
+        elif not missing and not stale:
+            self.stats["details"] += 1
+        elif evaluated:
+            self.stats["partial"] += 1
+        else:
+            self.stats["full"] += 1
+
+        if missing:
+            scan = self._matcher(missing).scan(text)
+            for low in missing:
+                found = scan.forms(low)
+                if found:
+                    cached[low] = found
+            evaluated.update(missing)
+        if changed and isinstance(url, str):
+            self._pending.append(
+                (url, digest, self.rules_hash, json.dumps(sorted(evaluated)), json.dumps(cached), self.details_hash)
+            )
+        return {low: cached.get(low, []) for low in lows}, changed
+
+    @property
+    def comparisons(self):
+        """Full fuzzy comparisons made by this cache's matchers so far."""
+        return sum(m.fuzzy_index.comparisons for m in self._matchers.values())
+
+    def lookup(self, urls, texts, lows):
+        """Returns per-row forms and whether each row changed."""
+        forms, recomputed = [], []
+        for url, text in zip(urls, texts):
+            row_forms, changed = self.forms(url, text, lows)
+            forms.append(row_forms)
+            recomputed.append(changed)
+        return forms, recomputed
+
+    def commit(self):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO analysis (url, text_hash, rules_hash, evaluated, forms, details_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+
+    def close(self):
+        self.conn.close()
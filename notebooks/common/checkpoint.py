@@ -0,0 +1,37 @@
+import json
+import os
+import threading
+
+
+class Checkpoint:
+    """Thread-safe JSON progress file for resumable crawls, rewritten on every update."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def get(self, key):
+        with self._lock:
+            return dict(self.state.get(key, {}))
+
+    def update(self, key, values):
+        with self._lock:
+            self.state.setdefault(key, {}).update(values)
+            self._write()
+
+    def _write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            self.state = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
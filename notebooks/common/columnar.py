@@ -0,0 +1,146 @@
+import csv
+import datetime
+import os
+import sys
+
+from common.export import parse_list
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+list_columns = [
+    "KeywordMatch", "KeywordExtracted", "ExtractedTime", "ExtractedAge", "ExtractedGender", "ExtractedAction",
+]
+category_columns = ["Location", "SourceFile", "Topic"]
+date_columns = ["Date", "ExtractedDate"]
+bool_columns = ["RightWingRelated"]
+
+
+def _date(value):
+    try:
+        return datetime.datetime.strptime(value, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _age(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _field(name):
+    if name == "ExtractedAge":
+        return pa.field(name, pa.list_(pa.int16()))
+    if name in list_columns:
+        return pa.field(name, pa.list_(pa.string()))
+    if name in category_columns:
+        return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+    if name in date_columns:
+        return pa.field(name, pa.date32())
+    if name in bool_columns:
+        return pa.field(name, pa.bool_())
+    return pa.field(name, pa.string())
+
+
+def _values(name, cells):
+    """Python values of one CSV column, in the type _field gives it; empty cells become nulls."""
+    if name == "ExtractedAge":
+        return [[_age(age) for age in parse_list(cell)] if cell else None for cell in cells]
+    if name in list_columns:
+        return [[str(item) for item in parse_list(cell)] if cell else None for cell in cells]
+    if name in date_columns:
+        return [_date(cell) for cell in cells]
+    if name in bool_columns:
+        return [cell == "True" if cell in ("True", "False") else None for cell in cells]
+    return [cell if cell else None for cell in cells]
+
+
+def up_to_date(csv_path, out_path):
+    return os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(csv_path)
+
+
+def write_parquet(csv_path, out_path, batch_size=10000):
+    """Writes an analysed CSV as a typed Parquet file; returns the number of rows.
+
+    The repr-string list columns become real list columns (ExtractedAge as
+    integers), Location, SourceFile and Topic are dictionary-encoded (pandas
+    categoricals), Date and ExtractedDate are dates and RightWingRelated is a
+    boolean. The CSV is converted batch_size rows at a time.
+    """
+    if pq is None:
+        raise RuntimeError("pyarrow is not installed")
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        schema = pa.schema([_field(name) for name in header])
+        tmp_path = out_path + ".tmp"
+        rows = 0
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            batch = []
+            for row in reader:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    rows += _write_batch(writer, schema, header, batch)
+                    batch = []
+            if batch or not rows:
+                rows += _write_batch(writer, schema, header, batch)
+    os.replace(tmp_path, out_path)
+    return rows
+
+
+def _write_batch(writer, schema, header, batch):
+    columns = list(zip(*batch)) if batch else [()] * len(header)
+    arrays = [
+        pa.array(_values(field.name, cells), type=field.type)
+        for field, cells in zip(schema, columns)
+    ]
+    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return len(batch)
+
+
+def _pandas_type(arrow_type):
+    import pandas as pd
+
+    if pa.types.is_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    if pa.types.is_list(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def read_parquet(path, columns=None):
+    """Loads a file written by write_parquet as a DataFrame, memory-mapping it.
+
+    Strings and lists stay Arrow-backed, dictionary columns come back as
+    categoricals and dates as datetime64.
+    """
+    if pq is None:
+        raise RuntimeError("pyarrow is not installed")
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(date_as_object=False, types_mapper=_pandas_type)
+
+
+def export_parquet(csv_path, out_path):
+    """Refreshes out_path from csv_path unless it is newer; prints what it did."""
+    if pq is None:
+        print("pyarrow is not installed, skipping the Parquet output.")
+        return
+    if up_to_date(csv_path, out_path):
+        return
+    rows = write_parquet(csv_path, out_path)
+    print(f"Saved typed columnar copy to: {out_path} ({rows} rows)")
+
+
+if __name__ == "__main__":
+    # Converts analysed CSVs next to themselves, e.g.
+    # python -m common.columnar rss/output/all_merged.csv
+    paths = sys.argv[1:]
+    if not paths:
+        raise SystemExit("usage: python -m common.columnar FILE.csv [FILE.csv ...]")
+    for path in paths:
+        export_parquet(path, os.path.splitext(path)[0] + ".parquet")
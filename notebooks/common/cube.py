@@ -0,0 +1,114 @@
+import itertools
+import os
+import sqlite3
+
+from common.export import article_day, parse_list
+from common.gazetteer import district_id
+
+dimensions = ["day", "district", "keyword", "action", "gender"]
+
+
+def article_cells(row):
+    """Cube cells one analysed row counts towards: every (day, district, keyword, action, gender).
+
+    The district is the gazetteer id of the row's Location. An article is
+    counted once per combination of its distinct terms; a dimension without
+    any term counts under "".
+    """
+    day = article_day(row) or ""
+    district = district_id(row.get("Location"))
+    keywords = sorted(set(parse_list(row.get("KeywordMatch")))) or [""]
+    actions = sorted(set(parse_list(row.get("ExtractedAction")))) or [""]
+    genders = sorted({g.lower() for g in parse_list(row.get("ExtractedGender"))}) or [""]
+    return [(day, district) + combo for combo in itertools.product(keywords, actions, genders)]
+
+
+class RollupCube:
+    """Article counts by day, district, keyword, action and gender, kept up to date per URL.
+
+    Each URL's cells are stored with it, so a changed or dropped article is
+    replaced without re-reading the rest of the corpus, and every rollup
+    counts distinct URLs: an article with several keywords is counted once
+    per day, not once per keyword, action and gender combination. A cube
+    written with other dimensions is dropped, so it gets rebuilt.
+    """
+
+    def __init__(self, path):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        # Earlier cubes kept summed counts per cell, which double-count in rollups.
+        self.conn.execute("DROP TABLE IF EXISTS cube")
+        self.conn.execute("DROP TABLE IF EXISTS contributions")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(cells)")]
+        if columns and columns != ["url"] + dimensions:
+            self.conn.execute("DROP TABLE cells")
+        types = ", ".join(f"{name} {'INTEGER' if name == 'district' else 'TEXT'}" for name in dimensions)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS cells (url TEXT, {types})")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cells_url ON cells (url)")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(DISTINCT url) FROM cells").fetchone()[0]
+
+    def _previous(self, url):
+        return sorted(self.conn.execute(f"SELECT {', '.join(dimensions)} FROM cells WHERE url = ?", (url,)))
+
+    def update(self, rows):
+        """Counts new rows and re-counts rows whose URL was counted before."""
+        placeholders = ", ".join("?" for _ in dimensions)
+        with self.conn:
+            for row in rows:
+                cells = article_cells(row)
+                if cells == self._previous(row["URL"]):
+                    continue
+                self.conn.execute("DELETE FROM cells WHERE url = ?", (row["URL"],))
+                self.conn.executemany(
+                    f"INSERT INTO cells (url, {', '.join(dimensions)}) VALUES (?, {placeholders})",
+                    ((row["URL"],) + cell for cell in cells),
+                )
+
+    def remove(self, urls):
+        with self.conn:
+            self.conn.executemany("DELETE FROM cells WHERE url = ?", ((url,) for url in urls))
+
+    def rebuild(self, rows):
+        with self.conn:
+            self.conn.execute("DELETE FROM cells")
+        self.update(rows)
+
+    def totals(self, by=("day",)):
+        """Distinct articles grouped by the given dimensions; "month" rolls days up to YYYY-MM."""
+        columns = []
+        for name in by:
+            if name == "month":
+                columns.append("substr(day, 1, 7)")
+            elif name in dimensions:
+                columns.append(name)
+            else:
+                raise ValueError(f"Unknown cube dimension: {name}")
+        selected = ", ".join(columns + ["COUNT(DISTINCT url)"])
+        grouped = ", ".join(columns)
+        query = f"SELECT {selected} FROM cells"
+        if grouped:
+            query += f" GROUP BY {grouped} ORDER BY {grouped}"
+        return self.conn.execute(query).fetchall()
+
+    def artifact(self, by):
+        """Compact JSON-ready totals: per-dimension value lists and [code, ..., count] cells."""
+        values = {name: [] for name in by}
+        codes = {name: {} for name in by}
+        cells = []
+        for row in self.totals(by):
+            cell = []
+            for name, value in zip(by, row):
+                if value not in codes[name]:
+                    codes[name][value] = len(values[name])
+                    values[name].append(value)
+                cell.append(codes[name][value])
+            cells.append(cell + [row[-1]])
+        return {"dimensions": list(by), "values": values, "cells": cells}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,238 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import zlib
+
+import numpy as np
+
+from common.matching import token_regex
+
+shingle_size = 3
+num_perm = 128
+bands = 16
+similarity_threshold = 0.8
+
+_prime = np.uint64((1 << 32) + 15)
+_rng = np.random.RandomState(1)
+_a = _rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+_b = _rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+
+def shingles(text):
+    """Hashes of the overlapping word n-grams of a lowercased text."""
+    tokens = token_regex.findall(text.lower())
+    if len(tokens) < shingle_size:
+        tokens = tokens + [""] * (shingle_size - len(tokens))
+    return {
+        zlib.crc32(" ".join(tokens[i:i + shingle_size]).encode("utf-8"))
+        for i in range(len(tokens) - shingle_size + 1)
+    }
+
+
+def signature(text):
+    """MinHash signature: num_perm minima of a*x + b mod p over the shingle hashes."""
+    hashes = np.fromiter(shingles(text), dtype=np.uint64)
+    return ((np.outer(hashes, _a) + _b) % _prime).min(axis=0).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+info_fields = ["Title", "Date", "Location", "SourceFile"]
+
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class DuplicateIndex:
+    """MinHash/LSH index of article texts, persisted so each run only adds new or edited articles.
+
+    Signatures are split into bands; articles sharing any band are
+    candidates, and candidates whose estimated similarity reaches the
+    threshold are recorded as pairs. Lookups cost one indexed query per band,
+    so building the index is roughly linear in the number of articles. The
+    hash of each indexed text is kept, so an article is only signed again
+    when its text changed.
+    """
+
+    def __init__(self, path, threshold=similarity_threshold):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.threshold = threshold
+        self.rows_per_band = num_perm // bands
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS signatures (url TEXT PRIMARY KEY, sig BLOB, info TEXT)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(signatures)")}
+        if "text_hash" not in columns:
+            self.conn.execute("ALTER TABLE signatures ADD COLUMN text_hash TEXT")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER, key BLOB, url TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (band, key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS bands_url ON bands (url)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pairs (a TEXT, b TEXT, similarity REAL, PRIMARY KEY (a, b))"
+        )
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def __contains__(self, url):
+        return self.conn.execute("SELECT 1 FROM signatures WHERE url = ?", (url,)).fetchone() is not None
+
+    def current(self, urls, texts):
+        """The subset of urls already indexed with the same text, looked up in chunks of 500."""
+        hashes = {url: _text_hash(text) for url, text in zip(urls, texts) if isinstance(url, str)}
+        urls = list(hashes)
+        found = set()
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            found.update(url for url, digest in self.conn.execute(
+                f"SELECT url, text_hash FROM signatures WHERE url IN ({placeholders})", chunk
+            ) if digest == hashes[url])
+        return found
+
+    def _signature(self, url):
+        row = self.conn.execute("SELECT sig FROM signatures WHERE url = ?", (url,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.uint32) if row else None
+
+    def _band_keys(self, sig):
+        r = self.rows_per_band
+        return [(band, sig[band * r:(band + 1) * r].tobytes()) for band in range(bands)]
+
+    def _remove(self, url):
+        self.conn.execute("DELETE FROM signatures WHERE url = ?", (url,))
+        self.conn.execute("DELETE FROM bands WHERE url = ?", (url,))
+        self.conn.execute("DELETE FROM pairs WHERE a = ? OR b = ?", (url, url))
+
+    def _pairs_of(self, url):
+        return {
+            (a, b) for a, b in self.conn.execute("SELECT a, b FROM pairs WHERE a = ? OR b = ?", (url, url))
+        }
+
+    def add(self, rows):
+        """Indexes article rows by URL; returns (url, other url, similarity) matches not stored before.
+
+        Rows indexed before with the same text are skipped; a known URL with
+        a changed text is signed again.
+        """
+        found = []
+        with self.conn:
+            for row in rows:
+                url = row["URL"]
+                text = f"{row.get('Title') or ''} {row.get('Text') or ''}"
+                digest = _text_hash(text)
+                known = self.conn.execute("SELECT text_hash FROM signatures WHERE url = ?", (url,)).fetchone()
+                if known and known[0] == digest:
+                    continue
+                previous = set()
+                if known:
+                    previous = self._pairs_of(url)
+                    self._remove(url)
+                sig = signature(text)
+                keys = self._band_keys(sig)
+                candidates = set()
+                for band, key in keys:
+                    candidates.update(
+                        row[0] for row in self.conn.execute(
+                            "SELECT url FROM bands WHERE band = ? AND key = ?", (band, key)
+                        )
+                    )
+                for other in sorted(candidates):
+                    score = similarity(sig, self._signature(other))
+                    if score >= self.threshold:
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO pairs (a, b, similarity) VALUES (?, ?, ?)",
+                            (min(url, other), max(url, other), score),
+                        )
+                        if (min(url, other), max(url, other)) not in previous:
+                            found.append((url, other, score))
+                info = {field: row.get(field) or "" for field in info_fields}
+                self.conn.execute(
+                    "INSERT INTO signatures (url, sig, info, text_hash) VALUES (?, ?, ?, ?)",
+                    (url, sig.tobytes(), json.dumps(info, ensure_ascii=False), digest),
+                )
+                self.conn.executemany(
+                    "INSERT INTO bands (band, key, url) VALUES (?, ?, ?)",
+                    ((band, key, url) for band, key in keys),
+                )
+        return found
+
+    def remove(self, urls):
+        with self.conn:
+            for url in urls:
+                self._remove(url)
+
+    def info(self, url):
+        row = self.conn.execute("SELECT info FROM signatures WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def pairs(self):
+        return self.conn.execute("SELECT a, b, similarity FROM pairs ORDER BY a, b").fetchall()
+
+    def clusters(self):
+        """Groups of URLs connected by near-duplicate pairs, each sorted, largest groups first."""
+        parent = {}
+
+        def find(url):
+            parent.setdefault(url, url)
+            while parent[url] != url:
+                parent[url] = parent[parent[url]]
+                url = parent[url]
+            return url
+
+        for a, b, _ in self.pairs():
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        groups = {}
+        for url in parent:
+            groups.setdefault(find(url), []).append(url)
+        return sorted((sorted(group) for group in groups.values()), key=lambda g: (-len(g), g[0]))
+
+    def close(self):
+        self.conn.close()
+
+
+def write_clusters(index, path):
+    """Writes one line per clustered article: cluster number, URL and the fields it was indexed with."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["Cluster", "URL"] + info_fields)
+        for number, group in enumerate(index.clusters(), start=1):
+            for url in group:
+                info = index.info(url)
+                writer.writerow([number, url] + [info.get(field, "") for field in info_fields])
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    # Reports near-duplicate clusters in analysed or scraped CSVs, e.g.
+    # python -m common.dedup rss/output/all_merged.csv historical/data/*.csv
+    paths = sys.argv[1:]
+    if not paths:
+        raise SystemExit("usage: python -m common.dedup FILE.csv [FILE.csv ...]")
+    rows = {}
+    for path in paths:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("URL"):
+                    row.setdefault("SourceFile", os.path.basename(path))
+                    rows.setdefault(row["URL"], row)
+    index = DuplicateIndex(":memory:")
+    index.add(rows.values())
+    clusters = index.clusters()
+    for number, group in enumerate(clusters, start=1):
+        print(f"Cluster {number}:")
+        for url in group:
+            print(f"  {rows[url].get('Date', '')} {rows[url].get('SourceFile', '')} {url}")
+    print(f"{len(rows)} articles, {len(clusters)} near-duplicate clusters "
+          f"({sum(len(g) for g in clusters)} articles).")
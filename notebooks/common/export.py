@@ -0,0 +1,197 @@
+import ast
+import csv
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+from common.gazetteer import district_id, districts
+from common.highlight import decode_spans
+from common.matching import TermMatcher
+from common.rules import action_terms, diff_threshold, keywords
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+export_version = 3
+undated = "undated"
+
+_action_matcher = None
+
+
+def parse_list(value):
+    if not value:
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return []
+    return list(parsed) if isinstance(parsed, (list, tuple)) else []
+
+
+def _iso_date(value):
+    try:
+        return datetime.datetime.strptime(value, "%d.%m.%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def article_day(row):
+    """ISO date of an analysed row, preferring the date extracted from its text."""
+    return _iso_date(row.get("ExtractedDate")) or _iso_date(row.get("Date"))
+
+
+def highlight_mismatches(row):
+    """Decoded keyword and action highlight spans of an analysed row that are not one of its matched terms.
+
+    A keyword span must be one of the row's KeywordExtracted forms, an action
+    span a form of one of its ExtractedAction terms.
+    """
+    global _action_matcher
+    text = ((row.get("Title") or "") + " " + (row.get("Text") or "")).encode("utf-16-le")
+    keyword_forms = {form.lower() for form in parse_list(row.get("KeywordExtracted"))}
+    actions = set(parse_list(row.get("ExtractedAction")))
+    mismatched = []
+    for start, end, kind in decode_spans(row.get("Highlights")):
+        span = text[2 * start:2 * end].decode("utf-16-le", errors="replace")
+        if kind == "keyword":
+            matched = span.lower() in keyword_forms
+        elif kind == "action":
+            if _action_matcher is None:
+                _action_matcher = TermMatcher({"actions": action_terms}, diff_threshold)
+            matched = bool(actions.intersection(_action_matcher.scan(span.lower()).hits("actions")))
+        else:
+            continue
+        if not matched:
+            mismatched.append(span)
+    return mismatched
+
+
+class Vocabulary:
+    """Assigns small integer codes to strings, starting from a fixed list."""
+
+    def __init__(self, known=()):
+        self.values = []
+        self.codes = {}
+        for value in known:
+            self.code(value)
+
+    def code(self, value):
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_artifact(path, data):
+    """Writes data plus .gz and .br siblings, leaving unchanged files untouched.
+
+    gzip is written with a zero mtime so identical input gives identical bytes.
+    """
+    changed = _write_if_changed(path, data)
+    if changed or not os.path.exists(path + ".gz"):
+        _write_if_changed(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None and (changed or not os.path.exists(path + ".br")):
+        _write_if_changed(path + ".br", brotli.compress(data, quality=11))
+    return changed
+
+
+def build_artifacts(rows):
+    """Splits analysed rows into lean metadata and month-sharded article text.
+
+    Row i of every metadata column describes article i; each shard lists the
+    article ids it holds so the frontend can join text to metadata on demand.
+    Raises ValueError if a row's highlight spans do not decode to its matched
+    terms, so misaligned spans are never exported.
+    """
+    keyword_vocab = Vocabulary(sorted(keywords))
+    action_vocab = Vocabulary(sorted(action_terms))
+    gender_vocab = Vocabulary()
+    columns = {"date": [], "district": [], "keywords": [], "genders": [], "actions": [], "times": []}
+    shards = {}
+
+    for i, row in enumerate(rows):
+        mismatched = highlight_mismatches(row)
+        if mismatched:
+            raise ValueError(f"Highlight spans of {row.get('URL')} do not match its terms: {mismatched}")
+        date = article_day(row)
+        columns["date"].append(date)
+        columns["district"].append(district_id(row.get("Location")))
+        columns["keywords"].append([keyword_vocab.code(k) for k in parse_list(row.get("KeywordMatch"))])
+        columns["genders"].append([gender_vocab.code(g.lower()) for g in parse_list(row.get("ExtractedGender"))])
+        columns["actions"].append([action_vocab.code(a) for a in parse_list(row.get("ExtractedAction"))])
+        columns["times"].append(parse_list(row.get("ExtractedTime")))
+
+        shard = shards.setdefault(date[:7] if date else undated, {
+            "ids": [], "title": [], "url": [], "text": [], "ages": [], "extracted": [], "highlights": []
+        })
+        shard["ids"].append(i)
+        shard["title"].append(row.get("Title") or "")
+        shard["url"].append(row.get("URL") or "")
+        shard["text"].append(row.get("Text") or "")
+        shard["ages"].append(parse_list(row.get("ExtractedAge")))
+        shard["extracted"].append(parse_list(row.get("KeywordExtracted")))
+        shard["highlights"].append(row.get("Highlights") or "")
+
+    shard_data = {month: _dumps(shard) for month, shard in sorted(shards.items())}
+    meta = {
+        "version": export_version,
+        "count": len(columns["date"]),
+        "keywords": keyword_vocab.values,
+        "actions": action_vocab.values,
+        "genders": gender_vocab.values,
+        "districts": [name for name, _, _ in districts],
+        "districtStates": [state for _, state, _ in districts],
+        "shards": {
+            month: {
+                "file": f"text/{month}.json",
+                "count": len(shards[month]["ids"]),
+                "hash": hashlib.sha1(data).hexdigest()[:12],
+            }
+            for month, data in shard_data.items()
+        },
+        "articles": columns,
+    }
+    return _dumps(meta), shard_data
+
+
+def export_frontend(csv_path, out_dir):
+    """Writes meta.json and text/<YYYY-MM>.json (each with .gz/.br) from an analysed CSV.
+
+    Shards of months that no longer have articles are removed. Returns the
+    number of files whose content changed.
+    """
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        meta, shard_data = build_artifacts(csv.DictReader(f))
+
+    changed = int(write_artifact(os.path.join(out_dir, "meta.json"), meta))
+    for month, data in shard_data.items():
+        changed += write_artifact(os.path.join(out_dir, "text", f"{month}.json"), data)
+
+    text_dir = os.path.join(out_dir, "text")
+    for name in os.listdir(text_dir) if os.path.isdir(text_dir) else []:
+        if name.split(".")[0] not in shard_data:
+            os.remove(os.path.join(text_dir, name))
+    return changed
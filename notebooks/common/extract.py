@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from common.highlight import highlight_spans
+from common.matching import TermMatcher, group_extracted, group_hits
+from common.rules import age_regex, date_regex, gender_regex, time_regex
+from common.stream import joined_text
+
+analysis_columns = [
+    'RightWingRelated', 'KeywordMatch', 'ExtractedDate', 'ExtractedTime',
+    'ExtractedAge', 'ExtractedGender', 'ExtractedAction', 'KeywordExtracted', 'Highlights'
+]
+
+
+def _objects(values, index):
+    return pd.Series(values, index=index, dtype=object)
+
+
+def extract_columns(df_text, dates, matcher, original=None):
+    """Analyses lowercased Title+Text and returns one column per analysis field."""
+    forms = [matcher.scan(text).all_forms() for text in df_text]
+    return columns_from_forms(df_text, dates, forms, matcher.groups, original)
+
+
+def columns_from_forms(df_text, dates, forms, groups, original=None):
+    """Builds the analysis columns from per-row term forms ({low: surface forms}).
+
+    Detail columns (date, time, age, gender, action, highlight spans) are
+    only filled for right-wing related rows, the rest stay empty. `original`
+    is Title+Text before lowercasing; highlight spans refer to it.
+    """
+    index = df_text.index
+    kws = [group_hits(row, groups["keywords"]) for row in forms]
+    related = pd.Series([bool(k) for k in kws], index=index)
+
+    related_text = df_text[related]
+    related_dates = dates[related]
+    extracted_date = related_dates.astype(str).str.lower().str.extract(date_regex, expand=False)
+
+    return pd.DataFrame({
+        'RightWingRelated': related,
+        'KeywordMatch': _objects(kws, index),
+        'ExtractedDate': extracted_date.fillna(related_dates),
+        'ExtractedTime': related_text.str.findall(time_regex),
+        'ExtractedAge': related_text.str.findall(age_regex),
+        'ExtractedGender': related_text.str.findall(gender_regex),
+        'ExtractedAction': _objects(
+            [group_hits(row, groups["actions"]) for row, rel in zip(forms, related) if rel],
+            related_text.index,
+        ),
+        'KeywordExtracted': _objects(
+            [group_extracted(row, groups["keywords"]) for row in forms], index
+        ),
+        'Highlights': _objects(
+            [
+                highlight_spans(text, row, groups, orig)
+                for text, orig, row, rel in zip(df_text, original if original is not None else df_text, forms, related)
+                if rel
+            ],
+            related_text.index,
+        ),
+    }, index=index)
+
+_worker_matcher = None
+
+
+def _init_worker(groups, threshold):
+    global _worker_matcher
+    _worker_matcher = TermMatcher(groups, threshold)
+
+
+def _extract_chunk(chunk):
+    df_text, dates, original = chunk
+    before = _worker_matcher.fuzzy_index.comparisons
+    columns = extract_columns(df_text, dates, _worker_matcher, original)
+    return columns, _worker_matcher.fuzzy_index.comparisons - before
+
+
+def _chunks(original, dates, chunk_size):
+    df_text = original.str.lower()
+    return [
+        (df_text.iloc[start:start + chunk_size], dates.iloc[start:start + chunk_size],
+         original.iloc[start:start + chunk_size])
+        for start in range(0, len(df_text), chunk_size)
+    ]
+
+
+def extract_batches(batches, groups, threshold, workers, chunk_size=500, stats=None):
+    """Yields (batch, analysis columns) for each DataFrame from read_batches.
+
+    Same results as extract_columns over the whole corpus, but only one batch
+    is analysed at a time; the matcher or process pool is set up once and
+    reused for every batch. If given, stats["fuzzy_comparisons"] is increased
+    by the full fuzzy comparisons each batch needed.
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("fuzzy_comparisons", 0)
+    if workers <= 1:
+        matcher = TermMatcher(groups, threshold)
+        for batch in batches:
+            before = matcher.fuzzy_index.comparisons
+            original = joined_text(batch)
+            columns = extract_columns(original.str.lower(), batch['Date'], matcher, original)
+            stats["fuzzy_comparisons"] += matcher.fuzzy_index.comparisons - before
+            yield batch, columns
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(groups, threshold)
+    ) as pool:
+        for batch in batches:
+            chunks = _chunks(joined_text(batch), batch['Date'], chunk_size)
+            parts = list(pool.map(_extract_chunk, chunks))
+            stats["fuzzy_comparisons"] += sum(comparisons for _, comparisons in parts)
+            yield batch, pd.concat([columns for columns, _ in parts])
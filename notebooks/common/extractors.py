@@ -0,0 +1,126 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml and html.parser build different trees from malformed markup, so the
+# extractors keep the parser the scrapers have always used.
+parser = "html.parser"
+
+
+def _has_class(*names):
+    # Strainers see the raw attribute string, so multi-valued classes are split here.
+    wanted = set(names)
+
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(c in wanted for c in classes)
+
+    return match
+
+
+berlin_article_only = SoupStrainer(class_=_has_class("textile", "polizeimeldung"))
+brandenburg_article_only = SoupStrainer(class_=_has_class("pbb-article-text", "pbb-ort", "pbb-landkreis"))
+berlin_listing_only = SoupStrainer("ul", class_=_has_class("list--tablelist"))
+brandenburg_listing_only = SoupStrainer("ul", class_=_has_class("pbb-searchlist"))
+
+
+def _soup(html, strainer):
+    return BeautifulSoup(html, parser, parse_only=strainer)
+
+
+def berlin_article(html):
+    """Returns (text, location) of a berlin.de press release."""
+    return berlin_article_from(_soup(html, berlin_article_only))
+
+
+def berlin_article_from(soup):
+    content = soup.find("div", class_="textile")
+    text = content.get_text(separator="\n", strip=True) if content else ""
+    location_tag = soup.find("p", class_="polizeimeldung", title="Ereignisort")
+    location = location_tag.get_text(strip=True) if location_tag else ""
+    return text, location
+
+
+def brandenburg_article(html):
+    """Returns (text, "Ort, Landkreis") of a polizei.brandenburg.de press release."""
+    return brandenburg_article_from(_soup(html, brandenburg_article_only))
+
+
+def brandenburg_article_from(soup):
+    content = soup.find("div", class_="pbb-article-text")
+    text = content.get_text(separator="\n", strip=True) if content else ""
+    ort_tag = soup.find("p", class_="pbb-ort")
+    landkreis_tag = soup.find("p", class_="pbb-landkreis")
+    location = ""
+    if ort_tag:
+        location = ort_tag.get_text(strip=True)
+    if landkreis_tag:
+        location += ", " + landkreis_tag.get_text(strip=True) if location else landkreis_tag.get_text(strip=True)
+    return text, location
+
+
+def berlin_listing(html):
+    """Returns the items of a berlin.de archive page, or [] when there are none."""
+    return berlin_listing_from(_soup(html, berlin_listing_only))
+
+
+def berlin_listing_from(soup):
+    items = []
+    for item in soup.select("ul.list--tablelist > li"):
+        date_div = item.find("div", class_="date")
+        text_div = item.find("div", class_="text")
+        if not date_div or not text_div:
+            continue
+        link = text_div.find("a")
+        location = ""
+        loc_span = text_div.find("span", class_="category")
+        if loc_span and "Ereignisort:" in loc_span.text:
+            location = loc_span.text.replace("Ereignisort:", "").strip()
+        items.append({
+            "href": link["href"],
+            "title": link.get_text(strip=True),
+            "date": date_div.get_text(strip=True).split(" ")[0],
+            "location": location,
+        })
+    return items
+
+
+def brandenburg_listing(html):
+    """Returns the items of a Brandenburg search page, or None without a result list."""
+    return brandenburg_listing_from(_soup(html, brandenburg_listing_only))
+
+
+def brandenburg_listing_from(soup):
+    ul = soup.find("ul", class_=lambda x: x and "pbb-searchlist" in x)
+    if not ul:
+        return None
+    items = []
+    for li in ul.find_all("li"):
+        h4 = li.find("h4")
+        a = h4.find("a") if h4 else None
+        if not a:
+            continue
+        strong = a.find("strong")
+        date_str = ""
+        p = li.find("p")
+        if p:
+            span = p.find("span")
+            if span:
+                span_text = span.get_text(separator=" ", strip=True)
+                if "Artikel vom" in span_text:
+                    date_str = span_text.split("Artikel vom")[-1].strip().split()[0]
+        items.append({
+            "href": a.get("href"),
+            "title": strong.get_text(strip=True) if strong else a.get_text(strip=True),
+            "date": date_str,
+        })
+    return items
+
+
+# page type -> (targeted extractor on raw HTML, same extraction on an already parsed soup)
+extractors = {
+    "berlin_article": (berlin_article, berlin_article_from),
+    "brandenburg_article": (brandenburg_article, brandenburg_article_from),
+    "berlin_listing": (berlin_listing, berlin_listing_from),
+    "brandenburg_listing": (brandenburg_listing, brandenburg_listing_from),
+}
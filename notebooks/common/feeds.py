@@ -0,0 +1,142 @@
+import calendar
+import json
+import os
+
+import feedparser
+import requests
+
+from common.fetch import polite_get
+
+
+class FeedState:
+    """ETag, Last-Modified, newest entry GUID and yield per feed, persisted as JSON.
+
+    The yield is a moving average of new entries per poll; budgeted runs poll
+    and fetch high-yield feeds first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.feeds = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.feeds = json.load(f)
+
+    def get(self, feed_url):
+        return self.feeds.get(feed_url, {})
+
+    def update(self, feed_url, state):
+        self.feeds[feed_url] = {k: v for k, v in state.items() if v not in (None, "")}
+
+    def entries_per_poll(self, feed_url):
+        """Average new entries per poll, None for a feed never polled."""
+        return self.get(feed_url).get("entries_per_poll")
+
+    def observed(self, feed_url, entries, weight=0.3):
+        """Moves the feed's yield towards the count of a poll's new entries."""
+        previous = self.entries_per_poll(feed_url)
+        if previous is None:
+            return float(len(entries))
+        return round((1 - weight) * previous + weight * len(entries), 3)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.feeds, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+
+
+class FeedSchedule:
+    """Next poll time per feed, adapted to how often each feed publishes.
+
+    Keeps the publication times of each feed's last `history` entries. A feed
+    is polled every `factor` times its mean gap between posts, counting the
+    time since its newest post so a feed that goes quiet backs off, clamped
+    to [min_interval, max_interval] seconds. Feeds without enough history
+    are polled every default_interval. Persisted as JSON.
+    """
+
+    def __init__(self, path, min_interval=300, max_interval=6 * 3600, default_interval=3600,
+                 factor=0.5, history=20):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.factor = factor
+        self.history = history
+        self.feeds = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.feeds = json.load(f)
+
+    def interval(self, feed_url, now):
+        published = self.feeds.get(feed_url, {}).get("published", [])
+        if len(published) < 2:
+            return self.default_interval
+        mean_gap = (now - published[0]) / len(published)
+        return min(self.max_interval, max(self.min_interval, self.factor * mean_gap))
+
+    def next_poll(self, feed_url):
+        return self.feeds.get(feed_url, {}).get("next_poll", 0)
+
+    def due(self, feed_urls, now):
+        return [feed_url for feed_url in feed_urls if self.next_poll(feed_url) <= now]
+
+    def observe(self, feed_url, entries, now):
+        """Records the entries a poll found and schedules the feed's next poll."""
+        feed = self.feeds.setdefault(feed_url, {})
+        stamps = [
+            calendar.timegm(entry["published_parsed"]) if entry.get("published_parsed") else now
+            for entry in entries
+        ]
+        feed["published"] = sorted(set(feed.get("published", []) + [int(t) for t in stamps]))[-self.history:]
+        feed["next_poll"] = int(now + self.interval(feed_url, now))
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.feeds, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+
+
+def entry_guid(entry):
+    return entry.get("id") or entry.get("link")
+
+
+def poll_feed(session, limiter, feed_url, previous):
+    """Fetches a feed conditionally and returns (new entries, state to persist).
+
+    A 304 returns no entries without parsing. Otherwise entries are walked
+    newest first and the walk stops at the newest GUID of the previous poll.
+    """
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("modified"):
+        headers["If-Modified-Since"] = previous["modified"]
+    try:
+        res = polite_get(session, limiter, feed_url, headers=headers)
+    except requests.exceptions.RequestException as e:
+        print(f"Feed fetch failed: {feed_url} – {e}")
+        return [], previous
+    if res.status_code == 304:
+        return [], previous
+    if res.status_code != 200:
+        print(f"Feed returned {res.status_code}: {feed_url}")
+        return [], previous
+
+    feed = feedparser.parse(res.content)
+    entries = []
+    for entry in feed.entries:
+        if previous.get("newest") and entry_guid(entry) == previous["newest"]:
+            break
+        entries.append(entry)
+
+    state = {
+        "etag": res.headers.get("ETag"),
+        "modified": res.headers.get("Last-Modified"),
+        "newest": entry_guid(feed.entries[0]) if feed.entries else previous.get("newest"),
+    }
+    return entries, state
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common.httpcache import CachingAdapter, ResponseCache
+
+USER_AGENT = "Mozilla/5.0"
+
+
+def make_session(pool_size=10, cache_dir=None, retries=3):
+    """Pooled keep-alive session that retries 5xx responses with exponential backoff.
+
+    With cache_dir (or SCRAPER_CACHE_DIR) set, GET responses go through an
+    on-disk ResponseCache; SCRAPER_CACHE_OFFLINE=1 serves every cached page
+    without revalidating it.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    cache_dir = cache_dir or os.environ.get("SCRAPER_CACHE_DIR")
+    session.response_cache = None
+    if cache_dir:
+        session.response_cache = ResponseCache(
+            cache_dir, offline=os.environ.get("SCRAPER_CACHE_OFFLINE") == "1"
+        )
+        adapter = CachingAdapter(
+            session.response_cache, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces out their start times."""
+
+    def __init__(self, min_interval=0.5, max_concurrent=2):
+        self.min_interval = min_interval
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_at = {}
+
+    def _slot(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.Semaphore(self.max_concurrent)
+            return self._slots[host]
+
+    def _wait_turn(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            self._next_at[host] = start + self.min_interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._slot(host):
+            self._wait_turn(host)
+            yield
+
+
+def polite_get(session, limiter, url, timeout=30, headers=None):
+    cache = getattr(session, "response_cache", None)
+    if cache is not None and not headers and cache.is_fresh(url):
+        return session.get(url, timeout=timeout)
+    with limiter.acquire(url):
+        return session.get(url, timeout=timeout, headers=headers)
+
+
+def fetch_all(items, fn, max_workers=8):
+    """Runs fn over items on a thread pool and returns results in input order."""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(fn, items))
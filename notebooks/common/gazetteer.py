@@ -0,0 +1,259 @@
+import csv
+import re
+import sys
+from collections import Counter
+
+from common.rules import street_regex
+
+unknown_district = 0
+
+# id -> (name, state, kind). Ids are published in the frontend data, so new
+# districts are only ever appended.
+districts = [
+    ("", "", "unknown"),
+    ("Mitte", "Berlin", "bezirk"),
+    ("Friedrichshain-Kreuzberg", "Berlin", "bezirk"),
+    ("Pankow", "Berlin", "bezirk"),
+    ("Charlottenburg-Wilmersdorf", "Berlin", "bezirk"),
+    ("Spandau", "Berlin", "bezirk"),
+    ("Steglitz-Zehlendorf", "Berlin", "bezirk"),
+    ("Tempelhof-Schöneberg", "Berlin", "bezirk"),
+    ("Neukölln", "Berlin", "bezirk"),
+    ("Treptow-Köpenick", "Berlin", "bezirk"),
+    ("Marzahn-Hellersdorf", "Berlin", "bezirk"),
+    ("Lichtenberg", "Berlin", "bezirk"),
+    ("Reinickendorf", "Berlin", "bezirk"),
+    ("Berlin (bezirksübergreifend)", "Berlin", "region"),
+    ("Brandenburg an der Havel", "Brandenburg", "kreisfreie stadt"),
+    ("Cottbus", "Brandenburg", "kreisfreie stadt"),
+    ("Frankfurt (Oder)", "Brandenburg", "kreisfreie stadt"),
+    ("Potsdam", "Brandenburg", "kreisfreie stadt"),
+    ("Barnim", "Brandenburg", "landkreis"),
+    ("Dahme-Spreewald", "Brandenburg", "landkreis"),
+    ("Elbe-Elster", "Brandenburg", "landkreis"),
+    ("Havelland", "Brandenburg", "landkreis"),
+    ("Märkisch-Oderland", "Brandenburg", "landkreis"),
+    ("Oberhavel", "Brandenburg", "landkreis"),
+    ("Oberspreewald-Lausitz", "Brandenburg", "landkreis"),
+    ("Oder-Spree", "Brandenburg", "landkreis"),
+    ("Ostprignitz-Ruppin", "Brandenburg", "landkreis"),
+    ("Potsdam-Mittelmark", "Brandenburg", "landkreis"),
+    ("Prignitz", "Brandenburg", "landkreis"),
+    ("Spree-Neiße", "Brandenburg", "landkreis"),
+    ("Teltow-Fläming", "Brandenburg", "landkreis"),
+    ("Uckermark", "Brandenburg", "landkreis"),
+    ("Brandenburg (überregional)", "Brandenburg", "region"),
+    ("Bundesweit", "", "region"),
+]
+
+# district name -> places within it (Berlin Ortsteile, Brandenburg towns and
+# larger Gemeinden). Each district's own name is indexed as well.
+places = {
+    "Mitte": ["Moabit", "Hansaviertel", "Tiergarten", "Wedding", "Gesundbrunnen"],
+    "Friedrichshain-Kreuzberg": ["Friedrichshain", "Kreuzberg"],
+    "Pankow": [
+        "Prenzlauer Berg", "Weißensee", "Blankenburg", "Heinersdorf", "Karow", "Stadtrandsiedlung Malchow",
+        "Blankenfelde", "Buch", "Französisch Buchholz", "Niederschönhausen", "Rosenthal", "Wilhelmsruh",
+    ],
+    "Charlottenburg-Wilmersdorf": [
+        "Charlottenburg", "Wilmersdorf", "Schmargendorf", "Grunewald", "Westend", "Charlottenburg-Nord",
+        "Halensee",
+    ],
+    "Spandau": [
+        "Haselhorst", "Siemensstadt", "Staaken", "Gatow", "Kladow", "Hakenfelde", "Falkenhagener Feld",
+        "Wilhelmstadt",
+    ],
+    "Steglitz-Zehlendorf": ["Steglitz", "Lichterfelde", "Lankwitz", "Zehlendorf", "Dahlem", "Nikolassee", "Wannsee"],
+    "Tempelhof-Schöneberg": ["Schöneberg", "Friedenau", "Tempelhof", "Mariendorf", "Marienfelde", "Lichtenrade"],
+    "Neukölln": ["Britz", "Buckow", "Rudow", "Gropiusstadt"],
+    "Treptow-Köpenick": [
+        "Treptow", "Alt-Treptow", "Plänterwald", "Baumschulenweg", "Johannisthal", "Niederschöneweide",
+        "Altglienicke", "Adlershof", "Bohnsdorf", "Oberschöneweide", "Köpenick", "Friedrichshagen",
+        "Rahnsdorf", "Grünau", "Müggelheim", "Schmöckwitz",
+    ],
+    "Marzahn-Hellersdorf": ["Marzahn", "Biesdorf", "Kaulsdorf", "Mahlsdorf", "Hellersdorf"],
+    "Lichtenberg": [
+        "Friedrichsfelde", "Karlshorst", "Falkenberg", "Malchow", "Wartenberg", "Hohenschönhausen",
+        "Neu-Hohenschönhausen", "Alt-Hohenschönhausen", "Fennpfuhl", "Rummelsburg",
+    ],
+    "Reinickendorf": [
+        "Tegel", "Konradshöhe", "Heiligensee", "Frohnau", "Hermsdorf", "Waidmannslust", "Lübars", "Wittenau",
+        "Märkisches Viertel", "Borsigwalde",
+    ],
+    "Berlin (bezirksübergreifend)": ["Berlin", "berlinweit", "bezirksübergreifend", "überbezirklich"],
+    "Brandenburg an der Havel": ["Brandenburg/Havel", "Brandenburg a.d. Havel"],
+    "Barnim": [
+        "Eberswalde", "Bernau bei Berlin", "Werneuchen", "Biesenthal", "Joachimsthal", "Oderberg", "Panketal",
+        "Wandlitz", "Ahrensfelde", "Schorfheide", "Chorin", "Finowfurt", "Klosterfelde",
+    ],
+    "Dahme-Spreewald": [
+        "Königs Wusterhausen", "Lübben (Spreewald)", "Luckau", "Mittenwalde", "Teupitz", "Wildau", "Zeuthen",
+        "Eichwalde", "Schönefeld", "Schulzendorf", "Bestensee", "Heidesee", "Märkisch Buchholz", "Golßen",
+        "Heideblick", "Niederlehme", "Lieberose", "Halbe", "Großziethen",
+    ],
+    "Elbe-Elster": [
+        "Herzberg (Elster)", "Finsterwalde", "Bad Liebenwerda", "Doberlug-Kirchhain", "Elsterwerda",
+        "Falkenberg/Elster", "Mühlberg/Elbe", "Schönewalde", "Sonnewalde", "Uebigau-Wahrenbrück", "Schlieben",
+        "Röderland", "Plessa", "Krauschütz", "Döllingen",
+    ],
+    "Havelland": [
+        "Rathenow", "Nauen", "Falkensee", "Premnitz", "Ketzin/Havel", "Friesack", "Rhinow", "Dallgow-Döberitz",
+        "Schönwalde-Glien", "Wustermark", "Brieselang", "Milower Land",
+    ],
+    "Märkisch-Oderland": [
+        "Strausberg", "Seelow", "Bad Freienwalde (Oder)", "Müncheberg", "Wriezen", "Altlandsberg",
+        "Buckow (Märkische Schweiz)", "Letschin", "Hoppegarten", "Dahlwitz-Hoppegarten", "Neuenhagen bei Berlin",
+        "Fredersdorf-Vogelsdorf", "Petershagen/Eggersdorf", "Rüdersdorf bei Berlin", "Küstriner Vorland",
+    ],
+    "Oberhavel": [
+        "Oranienburg", "Hennigsdorf", "Velten", "Hohen Neuendorf", "Gransee", "Zehdenick", "Fürstenberg/Havel",
+        "Kremmen", "Liebenwalde", "Mühlenbecker Land", "Glienicke/Nordbahn", "Birkenwerder", "Leegebruch",
+        "Oberkrämer", "Löwenberger Land",
+    ],
+    "Oberspreewald-Lausitz": [
+        "Senftenberg", "Lauchhammer", "Lübbenau/Spreewald", "Calau", "Großräschen", "Schwarzheide",
+        "Vetschau/Spreewald", "Ruhland", "Ortrand", "Altdöbern", "Schipkau",
+    ],
+    "Oder-Spree": [
+        "Fürstenwalde/Spree", "Eisenhüttenstadt", "Beeskow", "Erkner", "Storkow (Mark)", "Friedland", "Müllrose",
+        "Bad Saarow", "Grünheide (Mark)", "Schöneiche bei Berlin", "Woltersdorf", "Rietz-Neuendorf", "Tauche",
+        "Steinhöfel", "Briesen (Mark)",
+    ],
+    "Ostprignitz-Ruppin": [
+        "Neuruppin", "Kyritz", "Wittstock/Dosse", "Rheinsberg", "Neustadt (Dosse)", "Wusterhausen/Dosse",
+        "Fehrbellin", "Lindow (Mark)", "Heiligengrabe",
+    ],
+    "Potsdam-Mittelmark": [
+        "Werder (Havel)", "Teltow", "Kleinmachnow", "Stahnsdorf", "Beelitz", "Bad Belzig", "Brück",
+        "Treuenbrietzen", "Ziesar", "Wiesenburg/Mark", "Michendorf", "Schwielowsee", "Nuthetal", "Kloster Lehnin",
+        "Groß Kreutz (Havel)", "Seddiner See", "Niemegk",
+    ],
+    "Prignitz": [
+        "Perleberg", "Wittenberge", "Pritzwalk", "Bad Wilsnack", "Lenzen (Elbe)", "Meyenburg", "Putlitz",
+        "Karstädt", "Gumtow", "Groß Pankow", "Plattenburg", "Triglitz",
+    ],
+    "Spree-Neiße": [
+        "Forst (Lausitz)", "Guben", "Spremberg", "Drebkau", "Peitz", "Welzow", "Kolkwitz", "Burg (Spreewald)",
+        "Neuhausen/Spree", "Schenkendöbern", "Döbern",
+    ],
+    "Teltow-Fläming": [
+        "Luckenwalde", "Jüterbog", "Zossen", "Ludwigsfelde", "Trebbin", "Baruth/Mark", "Dahme/Mark",
+        "Blankenfelde-Mahlow", "Rangsdorf", "Großbeeren", "Am Mellensee", "Nuthe-Urstromtal", "Niedergörsdorf",
+    ],
+    "Uckermark": [
+        "Prenzlau", "Schwedt/Oder", "Templin", "Angermünde", "Brüssow", "Gartz (Oder)", "Lychen",
+        "Boitzenburger Land", "Nordwestuckermark",
+    ],
+    "Brandenburg (überregional)": ["Überregional", "landesweit", "bundeslandübergreifend"],
+    "Bundesweit": ["bundesweit"],
+}
+
+token_regex = re.compile(r"[a-zäöüß0-9]+(?:-[a-zäöüß0-9]+)*")
+# "Bernau b. Berlin", "Lübben (Spreewald)", "Schwedt/Oder": the town name before the qualifier.
+qualifier_regex = re.compile(r"\s+(?:bei|b\.|an der|a\.d\.)\s+.*$|\s*[(/].*$")
+_end = ""
+
+
+def tokens(name):
+    return tuple(token_regex.findall(name.lower().replace("b.", "bei ")))
+
+
+class Gazetteer:
+    """Maps free-text Location values to the integer ids in `districts`.
+
+    Every district and place name is a token sequence in a hash (for whole
+    comma-separated parts, the common case) and in a token trie (to find a
+    name inside a longer part, e.g. "BAB 15 bei Vetschau"). Parts are tried
+    right to left, since Brandenburg locations end in their Landkreis; parts
+    that look like streets are skipped and region-wide labels only count
+    when nothing more specific matches. Results are memoized per Location
+    string.
+    """
+
+    def __init__(self):
+        self.ids = {name: i for i, (name, _, _) in enumerate(districts)}
+        self.regions = {i for i, (_, _, kind) in enumerate(districts) if kind == "region"}
+        self.names = {}
+        self.trie = {}
+        for name, _, kind in districts:
+            if kind == "region":
+                self._add(name, self.ids[name], qualified=False)
+            elif kind != "unknown":
+                self._add(name, self.ids[name])
+        for district, members in places.items():
+            for place in members:
+                self._add(place, self.ids[district])
+        self.memo = {}
+
+    def _add(self, name, district_id, qualified=True):
+        variants = (name, qualifier_regex.sub("", name)) if qualified else (name,)
+        for variant in variants:
+            key = tokens(variant)
+            if not key:
+                continue
+            # Districts are added first, so a Landkreis keeps its name over a place of the same name.
+            self.names.setdefault(key, district_id)
+            node = self.trie
+            for token in key:
+                node = node.setdefault(token, {})
+            node.setdefault(_end, district_id)
+
+    def _scan(self, words):
+        """District id of the longest name found in words, leftmost first."""
+        for start in range(len(words)):
+            node = self.trie
+            found = None
+            for word in words[start:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                if _end in node:
+                    found = node[_end]
+            if found is not None:
+                return found
+        return None
+
+    def resolve(self, location):
+        if not location:
+            return unknown_district
+        if location in self.memo:
+            return self.memo[location]
+        parts = [tokens(part) for part in reversed(location.split(","))
+                 if not street_regex.fullmatch(part.strip().lower())]
+        found = [self.names[part] for part in parts if part in self.names]
+        if not found:
+            found = [i for i in map(self._scan, parts) if i is not None]
+        # "Potsdam, Überregional": a place beats a region-wide label.
+        district_id = next((i for i in found if i not in self.regions), found[0] if found else unknown_district)
+        self.memo[location] = district_id
+        return district_id
+
+
+_default = None
+
+
+def district_id(location):
+    """District id of a Location value, using a shared Gazetteer."""
+    global _default
+    if _default is None:
+        _default = Gazetteer()
+    return _default.resolve(location)
+
+
+if __name__ == "__main__":
+    # Lists Location values the gazetteer cannot place, most frequent first, e.g.
+    # python -m common.gazetteer rss/output/all_merged.csv historical/data/*.csv
+    paths = sys.argv[1:]
+    if not paths:
+        raise SystemExit("usage: python -m common.gazetteer FILE.csv [FILE.csv ...]")
+    gazetteer = Gazetteer()
+    counts = Counter()
+    for path in paths:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            counts.update(row.get("Location") or "" for row in csv.DictReader(f))
+    unplaced = [(location, n) for location, n in counts.most_common()
+                if location and gazetteer.resolve(location) == unknown_district]
+    for location, n in unplaced:
+        print(f"{n:6d}  {location}")
+    placed = sum(n for location, n in counts.items() if gazetteer.resolve(location) != unknown_district)
+    print(f"{placed} of {sum(counts.values())} rows placed, {len(unplaced)} distinct locations unplaced.")
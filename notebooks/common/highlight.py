@@ -0,0 +1,102 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from common.rules import age_regex, gender_regex, time_regex
+
+# kind -> letter used in the encoded spans
+span_kinds = {"keyword": "k", "action": "a", "time": "t", "age": "y", "gender": "g"}
+_kind_names = {letter: kind for kind, letter in span_kinds.items()}
+_encoded_span = re.compile(r"([a-z])(\d+)\.(\d+)")
+
+
+@lru_cache(maxsize=4096)
+def _forms_regex(forms):
+    return re.compile(r"\b(?:" + "|".join(re.escape(form) for form in forms) + r")\b")
+
+
+def term_spans(text, forms):
+    """(start, end) of every word-bounded occurrence of the given surface forms, longest form first."""
+    if not forms:
+        return []
+    ordered = tuple(sorted(forms, key=lambda form: (-len(form), form)))
+    return [m.span() for m in _forms_regex(ordered).finditer(text)]
+
+
+def find_spans(text, forms, groups):
+    """Sorted, non-overlapping (start, end, kind) matches in a lowercased Title + " " + Text.
+
+    Keyword and action spans cover the surface forms the matcher found
+    (forms is {low: surface forms}); time, age and gender spans are the
+    matches of the extraction regexes. Where spans overlap, the one starting
+    first (then the longer one) is kept.
+    """
+    spans = []
+    for kind, group in (("keyword", "keywords"), ("action", "actions")):
+        surface = {form for _, low in groups[group] for form in forms.get(low, ())}
+        spans.extend((start, end, kind) for start, end in term_spans(text, surface))
+    for kind, regex in (("time", time_regex), ("age", age_regex), ("gender", gender_regex)):
+        spans.extend(m.span() + (kind,) for m in regex.finditer(text))
+    spans.sort(key=lambda span: (span[0], -span[1]))
+    kept = []
+    for span in spans:
+        if not kept or span[0] >= kept[-1][1]:
+            kept.append(span)
+    return kept
+
+
+def _original_spans(original, spans):
+    """Maps spans of original.lower() back to original.
+
+    lower() can lengthen a character ("İ" becomes "i" plus a combining dot),
+    which would shift every later span.
+    """
+    starts = [0]
+    for ch in original:
+        starts.append(starts[-1] + len(ch.lower()))
+    return [
+        (bisect_right(starts, start) - 1, bisect_left(starts, end), kind)
+        for start, end, kind in spans
+    ]
+
+
+def _utf16_spans(text, spans):
+    """Converts code point offsets to the UTF-16 offsets JavaScript strings use."""
+    if not spans or max(text) <= "￿":
+        return spans
+    units = [0]
+    for ch in text:
+        units.append(units[-1] + (2 if ch > "￿" else 1))
+    return [(units[start], units[end], kind) for start, end, kind in spans]
+
+
+def encode_spans(spans):
+    """Packs sorted spans as <kind letter><gap since previous end>.<length>, e.g. "k12.7t30.9"."""
+    out = []
+    end = 0
+    for start, stop, kind in spans:
+        out.append(f"{span_kinds[kind]}{start - end}.{stop - start}")
+        end = stop
+    return "".join(out)
+
+
+def decode_spans(encoded):
+    spans = []
+    end = 0
+    for letter, gap, length in _encoded_span.findall(encoded or ""):
+        start = end + int(gap)
+        end = start + int(length)
+        spans.append((start, end, _kind_names[letter]))
+    return spans
+
+
+def highlight_spans(text, forms, groups, original=None):
+    """Encoded highlight spans of one lowercased Title + " " + Text (the Highlights column).
+
+    Offsets refer to `original`, the text before lowercasing, when given.
+    """
+    spans = find_spans(text, forms, groups)
+    if original is not None and len(original) != len(text):
+        spans = _original_spans(original, spans)
+        text = original
+    return encode_spans(_utf16_spans(text, spans))
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+FOREVER = None
+
+# (URL pattern, seconds), first match wins. Listings and feeds change;
+# anything else is a published press release and is kept forever.
+default_ttls = [
+    (re.compile(r"/rss/|/rss$|/suche/|/archiv/"), 3600),
+]
+
+kept_headers = ["Content-Type", "ETag", "Last-Modified"]
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of raw GET responses.
+
+    Metadata lives under meta/<sha256 of URL>.json and points at the body in
+    bodies/<sha256 of body>, so identical pages are stored once. In offline
+    mode every cached entry counts as fresh.
+    """
+
+    def __init__(self, directory, ttls=None, offline=False):
+        self.directory = directory
+        self.ttls = ttls or default_ttls
+        self.offline = offline
+
+    def _path(self, kind, digest):
+        return os.path.join(self.directory, kind, digest[:2], digest)
+
+    def _meta_path(self, url):
+        return self._path("meta", hashlib.sha256(url.encode("utf-8")).hexdigest()) + ".json"
+
+    def ttl(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return FOREVER
+
+    def load(self, url):
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, meta):
+        with open(self._path("bodies", meta["body"]), "rb") as f:
+            return f.read()
+
+    def fresh(self, meta):
+        ttl = self.ttl(meta["url"])
+        return self.offline or ttl is FOREVER or time.time() - meta["fetched_at"] < ttl
+
+    def is_fresh(self, url):
+        meta = self.load(url)
+        return meta is not None and self.fresh(meta)
+
+    def _write(self, path, data, mode):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def store(self, url, response):
+        digest = hashlib.sha256(response.content).hexdigest()
+        body_path = self._path("bodies", digest)
+        if not os.path.exists(body_path):
+            self._write(body_path, response.content, "wb")
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in kept_headers if h in response.headers},
+            "body": digest,
+            "fetched_at": time.time(),
+        }
+        self._write(self._meta_path(url), json.dumps(meta), "w")
+
+    def touch(self, meta):
+        meta["fetched_at"] = time.time()
+        self._write(self._meta_path(meta["url"]), json.dumps(meta), "w")
+
+
+class CachingAdapter(HTTPAdapter):
+    """Serves GETs from a ResponseCache and revalidates stale entries with ETag/Last-Modified.
+
+    Requests that already carry conditional headers (e.g. feed polling) pass
+    straight through, their caller handles the 304.
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if (
+            request.method != "GET"
+            or "If-None-Match" in request.headers
+            or "If-Modified-Since" in request.headers
+        ):
+            return super().send(request, **kwargs)
+
+        meta = self.cache.load(request.url)
+        if meta and self.cache.fresh(meta):
+            return self._cached_response(request, meta)
+        if meta:
+            headers = meta["headers"]
+            if "ETag" in headers:
+                request.headers["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+        if meta and response.status_code == 304:
+            self.cache.touch(meta)
+            return self._cached_response(request, meta)
+        if response.status_code == 200:
+            self.cache.store(request.url, response)
+        return response
+
+    def _cached_response(self, request, meta):
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = self.cache.body(meta)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
@@ -0,0 +1,188 @@
+import difflib
+import re
+import sys
+from collections import Counter, defaultdict
+
+token_regex = re.compile(r"\w+")
+word_char = re.compile(r"\w")
+
+
+def _shadows(short, long):
+    # Both terms could match at the same position, so they can't share one alternation.
+    return (
+        len(long) > len(short)
+        and long.startswith(short)
+        and not word_char.match(long[len(short)])
+    )
+
+
+def _layers(terms):
+    layers = []
+    for term in sorted(terms, key=len, reverse=True):
+        for layer in layers:
+            if not any(_shadows(term, other) for other in layer):
+                layer.append(term)
+                break
+        else:
+            layers.append([term])
+    return layers
+
+
+class FuzzyIndex:
+    """Finds the terms a token fuzzy-matches, memoised across documents.
+
+    Equivalent to comparing the token against every term with
+    difflib.SequenceMatcher, but candidates are first narrowed by length and
+    then by the shared-character bound (an upper bound on the ratio), so most
+    pairs never reach the full comparison.
+    """
+
+    def __init__(self, lows, threshold, max_len_diff=3):
+        self.threshold = threshold
+        self.max_len_diff = max_len_diff
+        self.by_length = defaultdict(list)
+        for low in lows:
+            self.by_length[len(low)].append((low, Counter(low)))
+        self.memo = {}
+        self.comparisons = 0
+
+    def lookup(self, tok):
+        hits = self.memo.get(tok)
+        if hits is None:
+            hits = self.memo[tok] = self._match(tok)
+        return hits
+
+    def _match(self, tok):
+        n = len(tok)
+        counts = None
+        hits = []
+        for length in range(n - self.max_len_diff, n + self.max_len_diff + 1):
+            candidates = self.by_length.get(length)
+            if not candidates:
+                continue
+            total = n + length
+            if 2.0 * min(n, length) / total < self.threshold:
+                continue
+            if counts is None:
+                counts = Counter(tok)
+            for low, low_counts in candidates:
+                shared = sum(min(c, low_counts[ch]) for ch, c in counts.items())
+                if 2.0 * shared / total < self.threshold:
+                    continue
+                self.comparisons += 1
+                if difflib.SequenceMatcher(None, tok, low).ratio() >= self.threshold:
+                    hits.append(low)
+        return tuple(hits)
+
+
+class TermMatcher:
+    """Matches several named term lists against lowercased text in one regex pass.
+
+    Each term hits on an exact word-bounded match or on a token whose
+    difflib ratio to the term reaches the threshold.
+    """
+
+    def __init__(self, groups, threshold):
+        self.threshold = threshold
+        self.groups = normalize_groups(groups)
+        self.lows = group_lows(self.groups)
+        self.patterns = [
+            re.compile(r"(?=\b(" + "|".join(re.escape(t) for t in layer) + r")\b)")
+            for layer in _layers(self.lows)
+        ]
+        self.fuzzy_index = FuzzyIndex(self.lows, threshold)
+
+    def scan(self, text):
+        return TermScan(self, text)
+
+
+class TermScan:
+    def __init__(self, matcher, text):
+        self.matcher = matcher
+        self.text = text
+        self.found = set()
+        for pattern in matcher.patterns:
+            self.found.update(m.group(1) for m in pattern.finditer(text))
+        self._fuzzy = None
+
+    def fuzzy(self, low):
+        if self._fuzzy is None:
+            self._fuzzy = defaultdict(list)
+            lookup = self.matcher.fuzzy_index.lookup
+            for tok in set(token_regex.findall(self.text)):
+                for hit in lookup(tok):
+                    self._fuzzy[hit].append(tok)
+        return self._fuzzy.get(low, ())
+
+    def forms(self, low):
+        """Surface forms of one lowercased term found in the text, empty on a miss."""
+        forms = set(self.fuzzy(low))
+        if low in self.found:
+            forms.add(low)
+        return sorted(forms)
+
+    def all_forms(self):
+        return {low: self.forms(low) for low in self.matcher.lows}
+
+    def hits(self, group):
+        """Canonical terms of the group found in the text (KeywordMatch)."""
+        return group_hits(self.all_forms(), self.matcher.groups[group])
+
+    def extracted(self, group):
+        """Surface forms of the group's terms found in the text (KeywordExtracted)."""
+        return group_extracted(self.all_forms(), self.matcher.groups[group])
+
+
+def normalize_groups(groups):
+    return {name: [(term, term.lower()) for term in terms] for name, terms in groups.items()}
+
+
+def group_lows(groups):
+    return sorted({low for terms in groups.values() for _, low in terms})
+
+
+def group_hits(forms, group_terms):
+    return [term for term, low in group_terms if forms.get(low)]
+
+
+def group_extracted(forms, group_terms):
+    return sorted({form for _, low in group_terms for form in forms.get(low, ())})
+
+def brute_force_fuzzy(tok, lows, threshold):
+    return tuple(
+        low for low in lows
+        if abs(len(tok) - len(low)) <= 3
+        and difflib.SequenceMatcher(None, tok, low).ratio() >= threshold
+    )
+
+
+def check_fuzzy_index(texts, lows, threshold):
+    """Compares FuzzyIndex against the plain difflib scan over every token in texts."""
+    index = FuzzyIndex(lows, threshold)
+    vocabulary = set()
+    for text in texts:
+        vocabulary.update(token_regex.findall(text))
+    mismatches = []
+    for tok in sorted(vocabulary):
+        expected = sorted(brute_force_fuzzy(tok, lows, threshold))
+        if sorted(index.lookup(tok)) != expected:
+            mismatches.append(tok)
+    return len(vocabulary), mismatches
+
+
+if __name__ == "__main__":
+    # python -m common.matching historical/data/*.csv rss/data/*.csv
+    import pandas as pd
+
+    from common.rules import action_terms, diff_threshold, keywords
+
+    texts = []
+    for path in sys.argv[1:]:
+        df = pd.read_csv(path)
+        texts.extend((df["Title"].fillna("") + " " + df["Text"].fillna("")).str.lower())
+    lows = sorted({t.lower() for t in keywords + action_terms})
+    checked, mismatches = check_fuzzy_index(texts, lows, diff_threshold)
+    print(f"Checked {checked} tokens against {len(lows)} terms, {len(mismatches)} mismatches.")
+    for tok in mismatches[:20]:
+        print(" ", tok)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,132 @@
+import cProfile
+import datetime
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+class RunReport:
+    """Wall time per stage, counters and per-host HTTP stats for one run, written as JSON.
+
+    Reports go to $RUN_REPORT_DIR (default "reports") as <name>-<timestamp>.json.
+    With RUN_PROFILE=1, profile() blocks are also dumped next to the report
+    as a cProfile .prof file. Safe to use from several threads.
+    """
+
+    def __init__(self, name, directory=None):
+        self.name = name
+        self.directory = directory or os.environ.get("RUN_REPORT_DIR", "reports")
+        self.profiling = os.environ.get("RUN_PROFILE") == "1"
+        self.started = datetime.datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = defaultdict(lambda: {"seconds": 0.0, "calls": 0})
+        self.counters = defaultdict(int)
+        self.values = {}
+        self.http = defaultdict(lambda: {"requests": 0, "bytes": 0, "cached": 0, "statuses": defaultdict(int)})
+        self._latencies = defaultdict(list)
+        self._profile = None
+        stamp = self.started.strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(self.directory, f"{name}-{stamp}.json")
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the wall time of the block to a named stage; stages may nest or repeat."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name]["seconds"] += elapsed
+                self.stages[name]["calls"] += 1
+
+    def timed(self, name, fn):
+        """Wraps fn so every call is recorded as stage name."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def record_response(self, response, *args, **kwargs):
+        host = urlsplit(response.url).netloc
+        with self._lock:
+            stats = self.http[host]
+            stats["requests"] += 1
+            stats["bytes"] += len(response.content)
+            stats["statuses"][str(response.status_code)] += 1
+            if getattr(response, "from_cache", False):
+                stats["cached"] += 1
+            else:
+                self._latencies[host].append(response.elapsed.total_seconds() * 1000)
+        return response
+
+    def instrument(self, session):
+        """Records every response of a requests session (count, bytes, status, latency)."""
+        session.hooks["response"].append(self.record_response)
+        return session
+
+    @contextmanager
+    def profile(self):
+        """cProfiles the block when RUN_PROFILE=1; repeated blocks share one profile."""
+        if not self.profiling:
+            yield
+            return
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def as_dict(self):
+        http = {}
+        for host, stats in self.http.items():
+            latencies = self._latencies[host]
+            http[host] = dict(stats, statuses=dict(stats["statuses"]))
+            if latencies:
+                http[host]["latency_ms"] = {
+                    "p50": percentile(latencies, 50),
+                    "p90": percentile(latencies, 90),
+                    "p99": percentile(latencies, 99),
+                    "max": max(latencies),
+                }
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self._start,
+            "stages": dict(self.stages),
+            "counters": dict(self.counters),
+            "values": self.values,
+            "http": http,
+        }
+
+    def write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+        if self._profile is not None:
+            self._profile.dump_stats(os.path.splitext(self.path)[0] + ".prof")
+        print(f"Run report: {self.path}")
+        return self.path
@@ -0,0 +1,26 @@
+import re
+
+keywords = [
+    "volksverhetzung", "hitlergruß", "hakenkreuz", "nazi", "rechtsextremistisch",
+    "rechtsextremisch", "fremdenfeindlich", "islamophobie", "islamfeindlichkeit",
+    "nationalsozialismus", "nationalsozialistisch", "nationalsozialistische",
+    "rassismus", "rassistisch", "antisemitismus", "antisemitisch", "homophobie",
+    "transphobie", "queerfeindlichkeit", "queerphobie", "sieg heil",
+    "verfassungswidrig", "mit politischem hintergrund"
+]
+
+action_terms = [
+    "graffiti", "angriff", "schlagen", "treten", "schubsen", "brandanschlag",
+    "beleidigung", "versammlung", "online posts", "raubüberfall", "diebstahl",
+    "körperverletzung", "tötungsversuch"
+]
+
+time_regex = re.compile(r"\b([0-2]?\d[:\.]?[0-5]?\d)\s*uhr")
+date_regex = re.compile(r"\b(\d{1,2}[\./]\d{1,2}[\./]\d{2,4})\b")
+age_regex = re.compile(r"\b(\d{1,3})(?:[- ]?jährig(?:e[rn]?)?|\sjahre alt)\b")
+gender_regex = re.compile(r"\b(mann|frau|jugendlicher|jugendliche|mädchen|junge)\b")
+street_regex = re.compile(r"\b[a-zäöüß]+(?:straße|platz|allee|ring)\b")
+
+diff_threshold = 0.85
+
+term_groups = {"keywords": keywords, "actions": action_terms}
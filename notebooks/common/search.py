@@ -0,0 +1,155 @@
+import argparse
+import csv
+import datetime
+import hashlib
+import os
+import sqlite3
+import time
+
+default_index = "search.sqlite"
+
+
+def _month(date):
+    try:
+        return datetime.datetime.strptime(date, "%d.%m.%Y").strftime("%Y-%m")
+    except (TypeError, ValueError):
+        return ""
+
+
+def _digest(row):
+    return hashlib.sha1(f"{row.get('Title') or ''}\n{row.get('Text') or ''}".encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    """SQLite FTS5 index over Title and Text of scraped articles, one document per URL.
+
+    Queries use FTS5 syntax: words, "exact phrases", prefix* terms, AND/OR/NOT
+    and NEAR(...). Tokens are case-folded but umlauts and ß are kept, so
+    "reichsbürger*" also finds "Reichsbürgerin" and "reichsbürgerszene".
+    """
+
+    def __init__(self, path=default_index):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+            "title, text, url UNINDEXED, date UNINDEXED, month UNINDEXED, location UNINDEXED, "
+            "source UNINDEXED, tokenize = 'unicode61 remove_diacritics 0')"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS digests (url TEXT PRIMARY KEY, doc INTEGER, digest TEXT)")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def add(self, rows, source=""):
+        """Indexes new URLs and re-indexes URLs whose title or text changed; returns how many.
+
+        A URL is one document, so when several inputs carry it the last one added wins.
+        """
+        changed = 0
+        with self.conn:
+            for row in rows:
+                url = row.get("URL")
+                if not url:
+                    continue
+                digest = _digest(row)
+                known = self.conn.execute("SELECT doc, digest FROM digests WHERE url = ?", (url,)).fetchone()
+                if known and known[1] == digest:
+                    continue
+                if known:
+                    self.conn.execute("DELETE FROM documents WHERE rowid = ?", (known[0],))
+                cursor = self.conn.execute(
+                    "INSERT INTO documents (title, text, url, date, month, location, source) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row.get("Title") or "", row.get("Text") or "", url, row.get("Date") or "",
+                     _month(row.get("Date")), row.get("Location") or "", row.get("SourceFile") or source),
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO digests (url, doc, digest) VALUES (?, ?, ?)",
+                    (url, cursor.lastrowid, digest),
+                )
+                changed += 1
+        return changed
+
+    def add_csv(self, path):
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return self.add(csv.DictReader(f), source=os.path.basename(path))
+
+    def _execute(self, sql, query, params):
+        try:
+            return self.conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from None
+
+    def search(self, query, limit=20, snippet_tokens=12):
+        """Best matches first, as dicts with URL, Title, Date, Location and a highlighted snippet."""
+        rows = self._execute(
+            "SELECT url, title, date, location, snippet(documents, 1, '[', ']', '…', ?) "
+            "FROM documents WHERE documents MATCH ? ORDER BY rank LIMIT ?",
+            query, (snippet_tokens, query, limit),
+        )
+        return [
+            {"URL": url, "Title": title, "Date": date, "Location": location, "Snippet": snippet}
+            for url, title, date, location, snippet in rows
+        ]
+
+    def count(self, query):
+        return self._execute("SELECT COUNT(*) FROM documents WHERE documents MATCH ?", query, (query,))[0][0]
+
+    def counts(self, query, by="location"):
+        """[(value, matching documents)] grouped by "location", "month" or "source", largest first."""
+        if by not in ("location", "month", "source"):
+            raise ValueError(f"Cannot group search results by {by!r}")
+        order = "value" if by == "month" else "n DESC, value"
+        return self._execute(
+            f"SELECT {by} AS value, COUNT(*) AS n FROM documents WHERE documents MATCH ? "
+            f"GROUP BY value ORDER BY {order}",
+            query, (query,),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the full-text index of scraped articles.")
+    parser.add_argument("--index", default=default_index, help="index database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index (or update the index with) article CSVs")
+    build.add_argument("files", nargs="+")
+    query = commands.add_parser("query", help="search the index")
+    query.add_argument("query", help='FTS5 query, e.g. reichsbürger* or "politischem hintergrund"')
+    query.add_argument("--by", choices=["location", "month", "source"], action="append",
+                       help="also print match counts grouped by this field")
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    if args.command == "build":
+        for path in args.files:
+            print(f"{path}: {index.add_csv(path)} documents added or updated")
+        print(f"{len(index)} documents indexed in {args.index}")
+    else:
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.query, limit=args.limit)
+            total = index.count(args.query)
+            groups = {by: index.counts(args.query, by) for by in args.by or []}
+        except ValueError as e:
+            raise SystemExit(str(e))
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['Date']}  {hit['Location']}  {hit['URL']}\n    {' '.join(hit['Snippet'].split())}")
+        for by, counts in groups.items():
+            print(f"\nBy {by}:")
+            for value, n in counts:
+                print(f"  {value or '(none)'}: {n}")
+        print(f"\n{total} matching documents ({elapsed:.1f} ms)")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
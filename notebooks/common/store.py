@@ -0,0 +1,235 @@
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+
+article_fields = ["Title", "Date", "Location", "Text", "URL"]
+
+
+class ArticleStore:
+    """SQLite table of rows with a unique URL index, mirrored to an append-only CSV.
+
+    New rows are inserted and appended to the CSV in one transaction, so a
+    run costs O(new rows) and seen() is a single index probe. The CSV is the
+    source of truth: if its content hash differs from the one recorded at the
+    last write (e.g. pulled from git or edited by hand), the table is rebuilt
+    from it on open and `rebuilt` is set, so derived indexes can be rebuilt
+    too. Fields passed in that the CSV does not have yet are added as empty
+    columns. Safe to share between threads.
+    """
+
+    def __init__(self, db_path, csv_path, fields=None, table="articles", lineterminator="\r\n"):
+        self.csv_path = csv_path
+        self.table = table
+        self.lineterminator = lineterminator
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.fields = self._csv_header() or self._stored_fields() or fields or article_fields
+        if "URL" not in self.fields:
+            raise ValueError("ArticleStore needs a URL field")
+        self.rebuilt = False
+        self._digest = None
+        self._sync_from_csv()
+        self._add_fields([f for f in fields or () if f not in self.fields])
+
+    def _add_fields(self, new_fields):
+        if not new_fields:
+            return
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({self.table})")}
+        with self.conn:
+            for field in new_fields:
+                if field not in existing:
+                    self.conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{field}" TEXT')
+            self.fields = self.fields + new_fields
+            self._set_meta("fields", ",".join(self.fields))
+            if self._csv_size():
+                self.export_csv(self.csv_path)
+            self._rehash()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (f"{self.table}.{key}",)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"{self.table}.{key}", str(value))
+        )
+
+    def _stored_fields(self):
+        fields = self._meta("fields")
+        return fields.split(",") if fields else None
+
+    def _csv_header(self):
+        if not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0:
+            return None
+        with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), None)
+
+    def _csv_size(self):
+        return os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+
+    def _hash_csv(self):
+        digest = hashlib.sha1()
+        if os.path.exists(self.csv_path):
+            with open(self.csv_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        return digest
+
+    def _rehash(self):
+        """Hashes the whole CSV after a rewrite and records it."""
+        self._digest = self._hash_csv()
+        self._set_meta("csv_hash", self._digest.hexdigest())
+
+    def _insert(self, rows):
+        before = self.conn.total_changes
+        placeholders = ", ".join("?" for _ in self.fields)
+        names = ", ".join(f'"{f}"' for f in self.fields)
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {self.table} ({names}) VALUES ({placeholders})",
+            ([_cell(row.get(f)) for f in self.fields] for row in rows),
+        )
+        return self.conn.total_changes - before
+
+    def _sync_from_csv(self):
+        self._digest = self._hash_csv()
+        columns = ", ".join(f'"{f}" TEXT' for f in self.fields)
+        with self.conn:
+            if self._digest.hexdigest() != self._meta("csv_hash"):
+                # Rows deleted or edited in the CSV must not survive in the table.
+                self.conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+                self.rebuilt = True
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id INTEGER PRIMARY KEY, {columns})")
+            self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {self.table}_url ON {self.table} ("URL")')
+            self._set_meta("fields", ",".join(self.fields))
+            if self.rebuilt:
+                if self._csv_size():
+                    with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+                        self._insert(csv.DictReader(f))
+                self._set_meta("csv_hash", self._digest.hexdigest())
+                self._set_meta("exported_id", self.last_id())
+
+    def last_id(self):
+        return self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}").fetchone()[0]
+
+    def seen(self, url):
+        with self._lock:
+            return self.conn.execute(
+                f'SELECT 1 FROM {self.table} WHERE "URL" = ? LIMIT 1', (url,)
+            ).fetchone() is not None
+
+    def urls(self):
+        return {row[0] for row in self.conn.execute(f'SELECT "URL" FROM {self.table}')}
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def get_state(self, key):
+        """Per-table crawler state (e.g. a high-water mark) kept next to the rows."""
+        with self._lock:
+            return self._meta(f"state.{key}")
+
+    def set_state(self, key, value):
+        with self._lock, self.conn:
+            self._set_meta(f"state.{key}", value)
+
+    def column(self, field):
+        with self._lock:
+            return [row[0] for row in self.conn.execute(f'SELECT "{field}" FROM {self.table}')]
+
+    def get(self, url):
+        names = ", ".join(f'"{f}"' for f in self.fields)
+        with self._lock:
+            values = self.conn.execute(
+                f'SELECT {names} FROM {self.table} WHERE "URL" = ?', (url,)
+            ).fetchone()
+        return dict(zip(self.fields, values)) if values else None
+
+    def rows(self, after_id=0):
+        names = ", ".join(f'"{f}"' for f in self.fields)
+        cursor = self.conn.execute(
+            f"SELECT {names} FROM {self.table} WHERE id > ? ORDER BY id", (after_id,)
+        )
+        for values in cursor:
+            yield dict(zip(self.fields, values))
+
+    def save(self, rows):
+        """Inserts rows with unseen URLs and appends them to the CSV atomically."""
+        with self._lock:
+            return self._save(rows)
+
+    def _save(self, rows):
+        size = self._csv_size()
+        exported = int(self._meta("exported_id") or 0)
+        try:
+            with self.conn:
+                added = self._insert(rows)
+                if added:
+                    self._append_csv(self.rows(exported), write_header=size == 0)
+                self._set_meta("csv_hash", self._digest.hexdigest())
+                self._set_meta("exported_id", self.last_id())
+        except BaseException:
+            if os.path.exists(self.csv_path) and self._csv_size() > size:
+                with open(self.csv_path, "r+b") as f:
+                    f.truncate(size)
+            self._digest = self._hash_csv()
+            raise
+        return added
+
+    def revise(self, rows, deleted_urls=()):
+        """Overwrites stored rows by URL, drops deleted URLs and rewrites the CSV.
+
+        Unlike save() this costs a full CSV export, so it is only meant for
+        rows whose content actually changed.
+        """
+        with self._lock, self.conn:
+            for row in rows:
+                fields = [f for f in self.fields if f in row and f != "URL"]
+                assignments = ", ".join(f'"{f}" = ?' for f in fields)
+                self.conn.execute(
+                    f'UPDATE {self.table} SET {assignments} WHERE "URL" = ?',
+                    [_cell(row[f]) for f in fields] + [row["URL"]],
+                )
+            self.conn.executemany(
+                f'DELETE FROM {self.table} WHERE "URL" = ?', ((url,) for url in deleted_urls)
+            )
+            self.export_csv(self.csv_path)
+            self._rehash()
+            self._set_meta("exported_id", self.last_id())
+
+    def _append_csv(self, rows, write_header):
+        # The appended bytes extend the running hash, so a save stays O(new rows).
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fields, lineterminator=self.lineterminator)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+        data = buffer.getvalue().encode("utf-8")
+        with open(self.csv_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._digest.update(data)
+
+    def export_csv(self, path):
+        """Writes every stored row to path, e.g. to rebuild a lost CSV."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields, lineterminator=self.lineterminator)
+            writer.writeheader()
+            writer.writerows(self.rows())
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.conn.close()
+
+
+def _cell(value):
+    return "" if value is None else value
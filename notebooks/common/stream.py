@@ -0,0 +1,79 @@
+import io
+import os
+
+import pandas as pd
+
+
+def input_columns(csv_files):
+    """Columns of the input CSVs plus SourceFile, in the order pd.concat would give them."""
+    columns = []
+    for file in csv_files:
+        for col in list(pd.read_csv(file, nrows=0).columns) + ["SourceFile"]:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def _batch_offsets(path, batch_size):
+    """The header line and the byte offsets of every batch_size-th record of a CSV, plus its end.
+
+    A line starts a new record unless it continues a quoted field, i.e. the
+    lines before it hold an odd number of quote characters.
+    """
+    offsets = []
+    with open(path, "rb") as f:
+        header = f.readline()
+        position = len(header)
+        records = 0
+        quoted = False
+        for line in f:
+            if not quoted:
+                if records % batch_size == 0:
+                    offsets.append(position)
+                records += 1
+            if line.count(b'"') % 2:
+                quoted = not quoted
+            position += len(line)
+    return header, offsets + [position]
+
+
+def _batches_from_end(path, batch_size):
+    """Batches of one CSV, last batch first; rows keep their order within a batch."""
+    header, offsets = _batch_offsets(path, batch_size)
+    with open(path, "rb") as f:
+        for start, end in reversed(list(zip(offsets, offsets[1:]))):
+            f.seek(start)
+            yield pd.read_csv(io.BytesIO(header + f.read(end - start)), dtype=str)
+
+
+def read_batches(csv_files, batch_size, newest_first=False):
+    """Yields the rows of all input CSVs as DataFrames of at most batch_size rows.
+
+    Cells are read as strings so every batch parses the same way regardless of
+    what else is in it, and batches share one running index. Only one batch is
+    held in memory at a time. The scrapers append rows oldest first, so with
+    newest_first each file's batches are read from its end backwards.
+    """
+    columns = input_columns(csv_files)
+    start = 0
+    for file in csv_files:
+        if newest_first:
+            batches = _batches_from_end(file, batch_size)
+        else:
+            batches = pd.read_csv(file, dtype=str, chunksize=batch_size)
+        for batch in batches:
+            batch["SourceFile"] = os.path.basename(file)
+            batch = batch.reindex(columns=columns)
+            batch.index = pd.RangeIndex(start, start + len(batch))
+            start += len(batch)
+            yield batch
+
+
+def joined_text(df):
+    """Title + " " + Text, the text the analysis and the frontend highlighting work on."""
+    return df['Title'].fillna('') + ' ' + df['Text'].fillna('')
+
+
+def append_csv(df, path, first):
+    """Writes df to path, replacing the file for the first batch and appending after that."""
+    df.to_csv(path, index=False, mode="w" if first else "a", header=first)
@@ -1,121 +1,64 @@
-import pandas as pd
+import argparse
 import glob
 import os
-import re
-import difflib
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.columnar import export_parquet
+from common.extract import analysis_columns, extract_batches
+from common.report import RunReport
+from common.rules import diff_threshold, term_groups
+from common.stream import append_csv, read_batches
 
 input_dir = "data"
 output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-csv_files = glob.glob(os.path.join(input_dir, "*.csv"))
-if not csv_files:
-    raise FileNotFoundError(f"No CSV files found in {input_dir}")
-
-dfs = []
-for file in csv_files:
-    df_temp = pd.read_csv(file)
-    df_temp["SourceFile"] = os.path.basename(file)
-    dfs.append(df_temp)
-
-df = pd.concat(dfs, ignore_index=True)
-
-df_text = (df['Title'].fillna('') + ' ' + df['Text'].fillna('')).str.lower()
-
-keywords = [
-    "volksverhetzung",
-    "hitlergruß",
-    "hakenkreuz",
-    "nazi",
-    "rechtsextremistisch",
-    "rechtsextremisch",
-    "fremdenfeindlich",
-    "islamophobie",
-    "islamfeindlichkeit",
-    "nationalsozialismus",
-    "nationalsozialistisch",
-    "nationalsozialistische",
-    "rassismus",
-    "rassistisch",
-    "antisemitismus",
-    "antisemitisch",
-    "homophobie",
-    "transphobie",
-    "queerfeindlichkeit",
-    "queerphobie",
-    "sieg heil",
-    "verfassungswidrig",
-    "mit politischem hintergrund"
-]
-
-action_terms = [
-    "graffiti", "angriff", "schlagen", "treten", "schubsen",
-    "brandanschlag", "beleidigung", "versammlung", "online posts",
-    "raubüberfall", "diebstahl", "körperverletzung",
-    "tötungsversuch"
-]
-
-time_regex = re.compile(r"\b([0-2]?\d[:\.]?[0-5]?\d)\s*uhr")
-date_regex = re.compile(r"\b(\d{1,2}[\./]\d{1,2}[\./]\d{2,4})\b")
-age_regex = re.compile(r"\b(\d{1,3})(?:[- ]?jährig(?:e[rn]?)?|\sjahre alt)\b")
-gender_regex = re.compile(r"\b(mann|frau|jugendlicher|jugendliche|mädchen|junge)\b")
-street_regex = re.compile(r"\b[a-zäöüß]+(?:straße|platz|allee|ring)\b")
-
-diff_threshold = 0.85
-
-for col in [
-    'RightWingRelated', 'KeywordMatch', 'ExtractedDate', 'ExtractedTime',
-    'ExtractedAge', 'ExtractedGender', 'ExtractedAction', 'KeywordExtracted', 'Topic'
-]:
-    df[col] = None
-
-def find_keywords(text, terms, threshold):
-    tokens = set(re.findall(r"\w+", text))
-    hits = []
-    for term in terms:
-        low = term.lower()
-        if re.search(rf"\b{re.escape(low)}\b", text):
-            hits.append(term)
-        else:
-            for tok in tokens:
-                if abs(len(tok) - len(low)) <= 3 and difflib.SequenceMatcher(None, tok, low).ratio() >= threshold:
-                    hits.append(term)
-                    break
-    return hits
-
-def find_keywords_with_matches(text, terms, threshold):
-    tokens = set(re.findall(r"\w+", text))
-    hits = []
-    for term in terms:
-        low = term.lower()
-        for m in re.finditer(rf"\b{re.escape(low)}\b", text):
-            hits.append(m.group(0))
-        for tok in tokens:
-            if abs(len(tok) - len(low)) <= 3 and difflib.SequenceMatcher(None, tok, low).ratio() >= threshold:
-                for m in re.finditer(rf"\b{re.escape(tok)}\b", text):
-                    hits.append(m.group(0))
-    return list(set(hits)) 
-
-for idx, text in df_text.items():
-    kws = find_keywords(text, keywords, diff_threshold)
-    related = bool(kws)
-    df.at[idx, 'RightWingRelated'] = related
-    df.at[idx, 'KeywordMatch'] = kws
-    df.at[idx, 'KeywordExtracted'] = find_keywords_with_matches(text, keywords, diff_threshold)
-    df.at[idx, 'Topic'] = "RightWing" if related else "Other"
-
-    if related:
-        date_match = date_regex.search(str(df.at[idx, 'Date']).lower())
-        df.at[idx, 'ExtractedDate'] = date_match.group(1) if date_match else df.at[idx, 'Date']
-
-        time_match = time_regex.findall(text)
-        df.at[idx, 'ExtractedTime'] = time_match
-
-        df.at[idx, 'ExtractedAge'] = age_regex.findall(text)
-        df.at[idx, 'ExtractedGender'] = gender_regex.findall(text)
-        df.at[idx, 'ExtractedAction'] = find_keywords(text, action_terms, diff_threshold)
 
-out_path = os.path.join(output_dir, "merged_parsed_documents_with_topic.csv")
-df.to_csv(out_path, index=False)
 
-print(f"Saved parsed data with topics to: {out_path}")
+def main():
+    parser = argparse.ArgumentParser(description="Analyse the historical police reports.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="analysis processes (1 runs serially)")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="rows per worker task")
+    parser.add_argument("--batch-size", type=int, default=10000,
+                        help="rows read, analysed and written at a time")
+    args = parser.parse_args()
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    csv_files = glob.glob(os.path.join(input_dir, "*.csv"))
+    if not csv_files:
+        raise FileNotFoundError(f"No CSV files found in {input_dir}")
+
+    out_path = os.path.join(output_dir, "merged_parsed_documents_with_topic.csv")
+    tmp_path = out_path + ".tmp"
+    report = RunReport("historical-analysis")
+    stats = {}
+
+    batches = read_batches(csv_files, args.batch_size)
+    results = extract_batches(batches, term_groups, diff_threshold, args.workers, args.chunk_size, stats)
+    with report.stage("analyse"), report.profile():
+        for n, (df, columns) in enumerate(results):
+            with report.stage("write"):
+                for col in analysis_columns:
+                    df[col] = columns[col]
+                df['Topic'] = columns['RightWingRelated'].map({True: "RightWing", False: "Other"})
+                append_csv(df, tmp_path, first=n == 0)
+            report.count("documents", len(df))
+            report.count("related", int(columns['RightWingRelated'].sum()))
+
+    os.replace(tmp_path, out_path)
+    print(f"Saved parsed data with topics to: {out_path}")
+    with report.stage("columnar copy"):
+        export_parquet(out_path, os.path.splitext(out_path)[0] + ".parquet")
+
+    documents = report.counters["documents"]
+    report.count("fuzzy_comparisons", stats["fuzzy_comparisons"])
+    report.set("workers", args.workers)
+    report.set("fuzzy_comparisons_per_document", stats["fuzzy_comparisons"] / documents if documents else 0)
+    report.set("documents_per_second", documents / report.stages["analyse"]["seconds"])
+    report.write()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,166 @@
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import urllib.robotparser
-import csv
-import time
+import argparse
 import os
+import sys
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bodyqueue import BodyQueue, drain
+from common.checkpoint import Checkpoint
+from common.extractors import berlin_article, berlin_listing
+from common.fetch import HostLimiter, make_session, polite_get
+from common.report import RunReport
+from common.store import ArticleStore
 
 base_url = "https://www.berlin.de"
+archive_path = "/polizei/polizeimeldungen/archiv/{year}/"
 years = list(range(2014, 2026))
 file_path = 'data/berlin_police_results.csv'
+store_path = 'data/articles.sqlite'
+checkpoint_path = 'data/berlin_checkpoint.json'
+queue_path = 'data/body_queue.sqlite'
+year_workers = 4
+per_host_interval = 0.5
+per_host_concurrency = 4
+
+
+def crawl_listings(session, limiter, store, queue, checkpoint, report,
+                   base=base_url, years=years, workers=year_workers):
+    """Phase 1: walks the archive listing of every year and queues new articles; returns how many."""
+    rp = urllib.robotparser.RobotFileParser()
+    rp.set_url(urljoin(base, "robots.txt"))
+    rp.read()
+    parse_listing = report.timed("parse listings", berlin_listing)
+
+    def crawl_year(year):
+        year_url = urljoin(base, archive_path.format(year=year))
+        if not rp.can_fetch("*", year_url):
+            print(f"⛔ Scraping not allowed by robots.txt for {year_url}.")
+            checkpoint.update(str(year), {"done": True})
+            return 0
+
+        progress = checkpoint.get(str(year))
+        if progress.get("done"):
+            print(f"✅ {year} already crawled in this backfill, skipping.")
+            return 0
+
+        page = progress.get("page", 1)
+        # Pages can shift while a backfill is interrupted, so a resumed year skips
+        # saved articles instead of treating them as the end of the archive.
+        resumed = page > 1
+        if resumed:
+            print(f"↩️ Resuming {year} at page {page} (last queued: {progress.get('last_url')})")
+
+        queued = 0
+        stop_scraping = False
+
+        while not stop_scraping:
+            page_url = year_url if page == 1 else f"{year_url}?page_at_1_0={page}#headline_1_0"
+            print(f"🔎 Fetching: {page_url}")
+            try:
+                res = polite_get(session, limiter, page_url)
+                if res.status_code != 200:
+                    print(f"⛔ {year}: Stopped. No more pages.")
+                    break
+            except Exception as e:
+                print(f"⚠️ Error fetching {year} page {page}: {e}")
+                return queued
 
-existing_urls = set()
-existing_rows = []
-if os.path.exists(file_path):
-    with open(file_path, 'r', encoding='utf-8', newline='') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            existing_urls.add(row["URL"])
-            existing_rows.append(row)
-
-rp = urllib.robotparser.RobotFileParser()
-rp.set_url(urljoin(base_url, "robots.txt"))
-rp.read()
-
-session = requests.Session()
-session.headers.update({"User-Agent": "Mozilla/5.0"})
-
-new_rows = []
-
-for year in years:
-    year_url = f"https://www.berlin.de/polizei/polizeimeldungen/archiv/{year}/"
-    if not rp.can_fetch("*", year_url):
-        print(f"⛔ Scraping not allowed by robots.txt for {year_url}.")
-        continue
-
-    page = 1
-    stop_scraping = False
+            items = parse_listing(res.text)
+            report.count("listing_pages")
+            if not items:
+                print(f"📭 {year}: No more list items found.")
+                break
 
-    while not stop_scraping:
-        page_url = year_url if page == 1 else f"{year_url}?page_at_1_0={page}#headline_1_0"
-        print(f"🔎 Fetching: {page_url}")
+            new_items = []
+            for item in items:
+                article_url = urljoin(base, item["href"])
+                if store.seen(article_url) or article_url in queue:
+                    if resumed:
+                        continue
+                    stop_scraping = True
+                    print(f"🛑 {year}: Reached already-known article, stopping.")
+                    break
+
+                try:
+                    datetime.datetime.strptime(item["date"], "%d.%m.%Y")
+                except ValueError:
+                    continue
+
+                new_items.append({
+                    "Title": item["title"],
+                    "Date": item["date"],
+                    "Location": item["location"],
+                    "URL": article_url
+                })
+
+            queued += queue.add(new_items)
+            page += 1
+            if new_items:
+                progress["last_url"] = new_items[-1]["URL"]
+            checkpoint.update(str(year), {"page": page, "last_url": progress.get("last_url")})
+
+        checkpoint.update(str(year), {"done": True})
+        return queued
+
+    with report.stage("crawl listings"), ThreadPoolExecutor(max_workers=workers) as pool:
+        queued = sum(pool.map(crawl_year, years))
+    if all(checkpoint.get(str(year)).get("done") for year in years):
+        checkpoint.clear()
+    return queued
+
+
+def fetch_bodies(session, limiter, store, queue, report, workers=per_host_concurrency):
+    """Phase 2: fetches the queued bodies, titles with keyword hits first; returns rows saved."""
+    parse_article = report.timed("parse articles", berlin_article)
+
+    def fetch_body(item):
         try:
-            res = session.get(page_url, timeout=30)
+            res = polite_get(session, limiter, item["URL"])
             if res.status_code != 200:
-                print("⛔ Stopped. No more pages.")
-                break
+                raise Exception("Bad status")
+            text, _ = parse_article(res.text)
         except Exception as e:
-            print(f"⚠️ Error fetching page {page}: {e}")
-            break
-
-        soup = BeautifulSoup(res.text, "html.parser")
-        items = soup.select("ul.list--tablelist > li")
-        if not items:
-            print("📭 No more list items found.")
-            break
-
-        for item in items:
-            date_div = item.find("div", class_="date")
-            text_div = item.find("div", class_="text")
-            if not date_div or not text_div:
-                continue
-
-            url_rel = text_div.find("a")["href"]
-            article_url = urljoin(base_url, url_rel)
-            if article_url in existing_urls:
-                stop_scraping = True
-                print("🛑 Reached already-saved article, stopping.")
-                break
-
-            title = text_div.find("a").get_text(strip=True)
-            date_str = date_div.get_text(strip=True).split(" ")[0]
-            try:
-                article_date = datetime.datetime.strptime(date_str, "%d.%m.%Y").date()
-            except ValueError:
-                continue
-
-            location = ""
-            loc_span = text_div.find("span", class_="category")
-            if loc_span and "Ereignisort:" in loc_span.text:
-                location = loc_span.text.replace("Ereignisort:", "").strip()
-
-            try:
-                art_res = session.get(article_url, timeout=30)
-                if art_res.status_code != 200:
-                    raise Exception("Bad status")
-                art_soup = BeautifulSoup(art_res.text, "html.parser")
-                content = art_soup.find("div", class_="textile")
-                text = content.get_text(separator="\n", strip=True) if content else ""
-            except Exception as e:
-                print(f"⚠️ Failed to fetch article: {article_url} – {e}")
-                continue
-
-            print(f"📍 {location} – {date_str} – {title}")
-            new_rows.append({
-                "Title": title,
-                "Date": date_str,
-                "Location": location,
-                "Text": text,
-                "URL": article_url
-            })
-
-        page += 1
-        time.sleep(2)
-
-all_rows = existing_rows + new_rows
-if len(new_rows) > 0:
-    with open(file_path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=["Title", "Date", "Location", "Text", "URL"])
-        writer.writeheader()
-        writer.writerows(all_rows)
-
-print(f"\nScraping complete. {len(new_rows)} new articles saved.")
\ No newline at end of file
+            print(f"⚠️ Failed to fetch article: {item['URL']} – {e}")
+            return None
+        return text, ""
+
+    with report.stage("fetch bodies"):
+        return drain(queue, fetch_body, store, workers=workers, report=report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Berlin police reports.")
+    parser.add_argument("--phase", choices=["all", "listings", "bodies"], default="all",
+                        help="walk the listing pages, fetch queued article bodies, or both (default)")
+    args = parser.parse_args()
+
+    report = RunReport("berlin-scrape")
+    store = ArticleStore(store_path, file_path, table="berlin")
+    queue = BodyQueue(queue_path, table="berlin")
+    session = report.instrument(make_session(pool_size=per_host_concurrency))
+    limiter = HostLimiter(min_interval=per_host_interval, max_concurrent=per_host_concurrency)
+
+    # Phase 1 only records what the listings show; bodies are fetched afterwards
+    # from the queue, titles with keyword hits first.
+    if args.phase != "bodies":
+        queued = crawl_listings(session, limiter, store, queue, Checkpoint(checkpoint_path), report)
+        print(f"\n📥 {queued} articles queued, {len(queue)} waiting for their body.")
+        report.count("articles_queued", queued)
+
+    saved = 0
+    if args.phase != "listings":
+        saved = fetch_bodies(session, limiter, store, queue, report)
+    report.count("queue_pending", len(queue))
+    queue.close()
+    store.close()
+
+    print(f"\nScraping complete. {saved} new articles saved.")
+    report.count("articles_saved", saved)
+    report.write()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,145 +1,197 @@
 import requests
-from bs4 import BeautifulSoup
+import argparse
 from urllib.parse import urljoin
 import urllib.robotparser
-import csv
 import time
 import os
+import sys
 import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bodyqueue import BodyQueue, drain
+from common.extractors import brandenburg_article, brandenburg_listing
+from common.fetch import HostLimiter, make_session, polite_get
+from common.report import RunReport
+from common.store import ArticleStore
+
 base_url = "https://polizei.brandenburg.de"
-url_template = f"{base_url}/suche/typ/null/kategorie/Kriminalit%C3%A4t/{{page}}/1?reset=1"
+search_path = "/suche/typ/null/kategorie/Kriminalit%C3%A4t/{page}/1?reset=1"
 file_path = 'data/brandenburg_police_results.csv'
+store_path = 'data/articles.sqlite'
+queue_path = 'data/body_queue.sqlite'
+body_interval = 0.5
+listing_interval = 3
 max_date = datetime.date(2019, 1, 1) 
 
-existing_urls = set()
-existing_data = []
-
-if os.path.exists(file_path):
-    with open(file_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            existing_data.append(row)
-            existing_urls.add(row["URL"])
-
-rp = urllib.robotparser.RobotFileParser()
-rp.set_url(urljoin(base_url, "robots.txt"))
-rp.read()
-if not rp.can_fetch("*", url_template.format(page=1)):
-    print("⛔ Scraping disallowed by robots.txt")
-    exit()
-
-session = requests.Session()
-session.headers.update({"User-Agent": "Mozilla/5.0"})
-
-new_rows = []
-page = 1
-stop_scraping = False
-
-while not stop_scraping:
-    page_url = url_template.format(page=page)
-    print("🔎 Fetching:", page_url)
+
+def parse_date(date_str):
     try:
-        response = session.get(page_url, timeout=30)
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Request error: {e}")
-        break
+        return datetime.datetime.strptime(date_str, '%d.%m.%Y').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def high_water_mark(store):
+    """Date of the newest article a completed crawl has seen, None on a first run."""
+    stored_mark = store.get_state("watermark_date")
+    if stored_mark:
+        return datetime.date.fromisoformat(stored_mark)
+    # A store rebuilt from the CSV has no state yet; the newest saved article is the mark.
+    return max(filter(None, map(parse_date, store.column("Date"))), default=None)
+
+
+def crawl_listings(session, store, queue, report, watermark=None, base=base_url, interval=listing_interval):
+    """Phase 1: walks the search listing newest first and queues new articles; returns how many.
+
+    Stops at max_date, or at the watermark date when given. A walk that
+    reaches its end moves the stored high-water mark to the newest article.
+    """
+    parse_listing = report.timed("parse listings", brandenburg_listing)
+    queued = 0
+    newest_date = None
+    newest_url = None
+    page = 1
+    stop_scraping = False
+    completed = False
+
+    while not stop_scraping:
+        page_url = urljoin(base, search_path.format(page=page))
+        print("🔎 Fetching:", page_url)
+        try:
+            with report.stage("fetch listings"):
+                response = session.get(page_url, timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Request error: {e}")
+            break
 
-    if response.status_code == 500:
-        print(f"⚠️ Page {page} returned 500. Skipping.")
-        page += 1
-        time.sleep(5)
-        continue
-    elif response.status_code != 200:
-        print(f"⛔ Unexpected status: {response.status_code}")
-        break
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    ul = soup.find("ul", class_=lambda x: x and "pbb-searchlist" in x)
-    if not ul:
-        print("⛔ No search results container found.")
-        break
-
-    items = ul.find_all("li")
-    if not items:
-        print("⛔ No results found on page.")
-        break
-
-    for li in items:
-        h4 = li.find("h4")
-        a = h4.find("a") if h4 else None
-        if not a:
+        if response.status_code == 500:
+            print(f"⚠️ Page {page} still returned 500 after retries. Skipping.")
+            page += 1
+            time.sleep(5)
             continue
+        elif response.status_code != 200:
+            print(f"⛔ Unexpected status: {response.status_code}")
+            break
 
-        strong = a.find("strong")
-        title = strong.get_text(strip=True) if strong else a.get_text(strip=True)
-        article_url = urljoin(base_url, a.get("href"))
-
-        if article_url in existing_urls:
-            print(f"⏭️ Already saved: {article_url}")
+        items = parse_listing(response.text)
+        report.count("listing_pages")
+        if items is None:
+            print("⛔ No search results container found.")
+            completed = True
             break
 
-        p = li.find("p")
-        date_str = ""
-        if p:
-            span = p.find("span")
-            if span:
-                span_text = span.get_text(separator=" ", strip=True)
-                if "Artikel vom" in span_text:
-                    date_str = span_text.split("Artikel vom")[-1].strip().split()[0]
-
-        article_date = None
-        if date_str:
-            try:
-                article_date = datetime.datetime.strptime(date_str, '%d.%m.%Y').date()
-            except ValueError:
-                pass
-
-        if article_date and article_date <= max_date:
-            print(f"🛑 Reached max date ({article_date.strftime('%d.%m.%Y')}). Stopping.")
-            stop_scraping = True
+        if not items:
+            print("⛔ No results found on page.")
+            completed = True
             break
 
+        new_items = []
+        for item in items:
+            title = item["title"]
+            article_url = urljoin(base, item["href"])
+            date_str = item["date"]
+
+            article_date = parse_date(date_str) if date_str else None
+
+            if article_date and article_date <= max_date:
+                print(f"🛑 Reached max date ({article_date.strftime('%d.%m.%Y')}). Stopping.")
+                stop_scraping = True
+                break
+
+            if watermark and article_date and article_date < watermark:
+                print(f"🏁 Passed high-water mark ({watermark:%d.%m.%Y}). Stopping.")
+                stop_scraping = True
+                break
+
+            if article_date and (newest_date is None or article_date > newest_date):
+                newest_date, newest_url = article_date, article_url
+
+            if store.seen(article_url) or article_url in queue:
+                print(f"⏭️ Already known: {article_url}")
+                continue
+
+            new_items.append({
+                "Title": title,
+                "Date": date_str,
+                "URL": article_url
+            })
+
+        queued += queue.add(new_items)
+        page += 1
+        if stop_scraping:
+            completed = True
+        elif not getattr(response, "from_cache", False):
+            time.sleep(interval)
+
+    if completed and newest_date and (watermark is None or newest_date >= watermark):
+        store.set_state("watermark_date", newest_date.isoformat())
+        store.set_state("watermark_url", newest_url)
+    return queued
+
+
+def fetch_bodies(session, limiter, store, queue, report):
+    """Phase 2: fetches the queued bodies, titles with keyword hits first; returns rows saved."""
+    parse_article = report.timed("parse articles", brandenburg_article)
+
+    def fetch_body(item):
         try:
-            art_response = session.get(article_url, timeout=30)
+            res = polite_get(session, limiter, item["URL"])
         except requests.exceptions.RequestException as e:
             print(f"⚠️ Article fetch failed: {e}")
-            continue
-
-        if art_response.status_code != 200:
-            text = ""
-            location = ""
-        else:
-            art_soup = BeautifulSoup(art_response.text, 'html.parser')
-            content = art_soup.find("div", class_="pbb-article-text")
-            text = content.get_text(separator="\n", strip=True) if content else ""
-
-            ort_tag = art_soup.find("p", class_="pbb-ort")
-            landkreis_tag = art_soup.find("p", class_="pbb-landkreis")
-            location = ""
-            if ort_tag:
-                location = ort_tag.get_text(strip=True)
-            if landkreis_tag:
-                location += ", " + landkreis_tag.get_text(strip=True) if location else landkreis_tag.get_text(strip=True)
-
-        new_rows.append({
-            "Title": title,
-            "Date": date_str,
-            "Location": location,
-            "Text": text,
-            "URL": article_url
-        })
-
-    page += 1
-    time.sleep(3)
-
-combined = existing_data + new_rows
-
-if len(new_rows) > 0:
-    with open(file_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Title", "Date", "Location", "Text", "URL"])
-        for r in combined:
-            writer.writerow([r["Title"], r["Date"], r["Location"], r["Text"], r["URL"]])
-
-print(f"\nScraping complete. {len(new_rows)} new articles saved.")
\ No newline at end of file
+            return None
+        if res.status_code != 200:
+            print(f"⚠️ Article returned {res.status_code}: {item['URL']}")
+            return None
+        return parse_article(res.text)
+
+    with report.stage("fetch bodies"):
+        return drain(queue, fetch_body, store, report=report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape Brandenburg police reports.")
+    parser.add_argument("--backfill", action="store_true",
+                        help=f"ignore the high-water mark and walk back to {max_date:%d.%m.%Y} to fill gaps")
+    parser.add_argument("--phase", choices=["all", "listings", "bodies"], default="all",
+                        help="walk the listing pages, fetch queued article bodies, or both (default)")
+    args = parser.parse_args()
+
+    report = RunReport("brandenburg-scrape")
+    store = ArticleStore(store_path, file_path, table="brandenburg")
+    queue = BodyQueue(queue_path, table="brandenburg")
+
+    watermark = None if args.backfill else high_water_mark(store)
+    if watermark:
+        print(f"🏁 Incremental run, stopping at high-water mark {watermark:%d.%m.%Y}")
+
+    rp = urllib.robotparser.RobotFileParser()
+    rp.set_url(urljoin(base_url, "robots.txt"))
+    rp.read()
+    if not rp.can_fetch("*", urljoin(base_url, search_path.format(page=1))):
+        print("⛔ Scraping disallowed by robots.txt")
+        exit()
+
+    session = report.instrument(make_session())
+    limiter = HostLimiter(min_interval=body_interval, max_concurrent=1)
+
+    # Phase 1 only records what the listings show; bodies are fetched afterwards
+    # from the queue, titles with keyword hits first.
+    if args.phase != "bodies":
+        queued = crawl_listings(session, store, queue, report, watermark)
+        print(f"\n📥 {queued} articles queued, {len(queue)} waiting for their body.")
+        report.count("articles_queued", queued)
+
+    saved = 0
+    if args.phase != "listings":
+        saved = fetch_bodies(session, limiter, store, queue, report)
+    report.count("queue_pending", len(queue))
+    queue.close()
+    store.close()
+
+    print(f"\nScraping complete. {saved} new articles saved.")
+    report.count("articles_saved", saved)
+    report.write()
+
+
+if __name__ == "__main__":
+    main()
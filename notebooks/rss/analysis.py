@@ -1,137 +1,278 @@
 import pandas as pd
+import argparse
+import csv
 import glob
+import io
+import itertools
 import os
-import re
-import difflib
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.budget import TimeBudget
+from common.cache import AnalysisCache
+from common.columnar import export_parquet
+from common.cube import RollupCube
+from common.dedup import DuplicateIndex, write_clusters
+from common.extract import analysis_columns, columns_from_forms
+from common.matching import group_lows, normalize_groups
+from common.report import RunReport
+from common.rules import diff_threshold, term_groups
+from common.store import ArticleStore, article_fields
+from common.stream import append_csv, joined_text, read_batches
 
 input_dir = "data"
 output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-master_file = os.path.join(output_dir, "all_merged.csv")
-if os.path.exists(master_file):
-    df_all = pd.read_csv(master_file)
-else:
-    df_all = pd.DataFrame()
-
-csv_files = glob.glob(os.path.join(input_dir, "*.csv"))
-if not csv_files:
-    raise FileNotFoundError(f"No CSV files found in {input_dir}")
-
-dfs = []
-for file in csv_files:
-    df_temp = pd.read_csv(file)
-    df_temp["SourceFile"] = os.path.basename(file)
-    dfs.append(df_temp)
-
-df = pd.concat(dfs, ignore_index=True)
-
-if not df_all.empty and "URL" in df_all.columns and "URL" in df.columns:
-    df_new = df[~df["URL"].isin(df_all["URL"])].copy()  # <--- THIS LINE!
-else:
-    df_new = df.copy() 
-
-
-if df_new.empty:
-    print("No new rows to parse.")
-    exit()
-
-df_text = (df_new['Title'].fillna('') + ' ' + df_new['Text'].fillna('')).str.lower()
-
-keywords = [
-    "volksverhetzung", "hitlergruß", "hakenkreuz", "nazi", "rechtsextremistisch",
-    "rechtsextremisch", "fremdenfeindlich", "islamophobie", "islamfeindlichkeit",
-    "nationalsozialismus", "nationalsozialistisch", "nationalsozialistische",
-    "rassismus", "rassistisch", "antisemitismus", "antisemitisch", "homophobie",
-    "transphobie", "queerfeindlichkeit", "queerphobie", "sieg heil",
-    "verfassungswidrig", "mit politischem hintergrund"
-]
-
-action_terms = [
-    "graffiti", "angriff", "schlagen", "treten", "schubsen", "brandanschlag",
-    "beleidigung", "versammlung", "online posts", "raubüberfall", "diebstahl",
-    "körperverletzung", "tötungsversuch"
-]
-
-time_regex = re.compile(r"\b([0-2]?\d[:\.]?[0-5]?\d)\s*uhr")
-date_regex = re.compile(r"\b(\d{1,2}[\./]\d{1,2}[\./]\d{2,4})\b")
-age_regex = re.compile(r"\b(\d{1,3})(?:[- ]?jährig(?:e[rn]?)?|\sjahre alt)\b")
-gender_regex = re.compile(r"\b(mann|frau|jugendlicher|jugendliche|mädchen|junge)\b")
-
-diff_threshold = 0.85
-
-for col in [
-    'RightWingRelated', 'KeywordMatch', 'ExtractedDate', 'ExtractedTime',
-    'ExtractedAge', 'ExtractedGender', 'ExtractedAction', 'KeywordExtracted'
-]:
-    df_new.loc[:, col] = None
-
-def find_keywords(text, terms, threshold):
-    tokens = set(re.findall(r"\w+", text))
-    hits = []
-    for term in terms:
-        low = term.lower()
-        if re.search(rf"\b{re.escape(low)}\b", text):
-            hits.append(term)
-        else:
-            for tok in tokens:
-                if abs(len(tok) - len(low)) <= 3 and difflib.SequenceMatcher(None, tok, low).ratio() >= threshold:
-                    hits.append(term)
-                    break
-    return hits
-
-def find_keywords_with_matches(text, terms, threshold):
-    tokens = set(re.findall(r"\w+", text))
-    hits = []
-    for term in terms:
-        low = term.lower()
-        for m in re.finditer(rf"\b{re.escape(low)}\b", text):
-            hits.append(m.group(0))
-        for tok in tokens:
-            if abs(len(tok) - len(low)) <= 3 and difflib.SequenceMatcher(None, tok, low).ratio() >= threshold:
-                for m in re.finditer(rf"\b{re.escape(tok)}\b", text):
-                    hits.append(m.group(0))
-    return list(set(hits)) 
-
-for idx, text in df_text.items():
-    kws = find_keywords(text, keywords, diff_threshold)
-    related = bool(kws)
-    df_new.at[idx, 'RightWingRelated'] = related
-    df_new.at[idx, 'KeywordMatch'] = kws
-    df_new.at[idx, 'KeywordExtracted'] = find_keywords_with_matches(text, keywords, diff_threshold)
-
-    if related:
-        date_match = date_regex.search(str(df_new.at[idx, 'Date']).lower())
-        df_new.at[idx, 'ExtractedDate'] = date_match.group(1) if date_match else df_new.at[idx, 'Date']
-
-        time_match = time_regex.findall(text)
-        df_new.at[idx, 'ExtractedTime'] = time_match
-
-        df_new.at[idx, 'ExtractedAge'] = age_regex.findall(text)
-        df_new.at[idx, 'ExtractedGender'] = gender_regex.findall(text)
-        df_new.at[idx, 'ExtractedAction'] = find_keywords(text, action_terms, diff_threshold)
-
-parsed = df_new[df_new['RightWingRelated'] == True].copy()
-
-out_path = os.path.join(output_dir, "merged_parsed_documents.csv")
-parsed.to_csv(out_path, index=False)
-print(f"Saved parsed data to: {out_path}")
-
-if 'Topic' in parsed.columns:
-    parsed = parsed.drop(columns=['Topic'])
-
-if not df_all.empty:
-    for col in parsed.columns:
-        if col not in df_all.columns:
-            df_all[col] = None
-    for col in df_all.columns:
-        if col not in parsed.columns:
-            parsed[col] = None
-    df_combined = pd.concat([df_all, parsed[df_all.columns]], ignore_index=True)
+batch_size = 10000
+# Batches are where a time budget can stop, so budgeted runs use small ones.
+budget_batch_size = 500
+
+
+def _csv_rows(df):
+    """Rows of df as the master CSV holds them, every value as its CSV string."""
+    return list(csv.DictReader(io.StringIO(df.to_csv(index=False))))
+
+
+def _diverged(df, master_store):
+    """Mask of the rows whose URL is in the master with a different title, text or date."""
+    fields = ["Title", "Text", "Date"]
+    mask = []
+    for row in df[["URL"] + fields].fillna('').itertuples(index=False):
+        stored = master_store.get(row.URL) if row.URL else None
+        mask.append(bool(stored) and any((stored[f] or '') != getattr(row, f) for f in fields))
+    return pd.Series(mask, index=df.index, dtype=bool)
+
+
+def _revisions(rows, master_store, skip_urls):
+    """Analysis columns of the rows whose master copy has a different analysis.
+
+    Only the analysis output is revised; the article fields stay as first
+    saved, whichever input they came from.
+    """
+    revised = []
+    for row in rows:
+        stored = master_store.get(row["URL"])
+        if stored and row["URL"] not in skip_urls and any(stored.get(f) != row[f] for f in analysis_columns):
+            revised.append({f: row[f] for f in ["URL"] + analysis_columns})
+    return revised
+
+
+def main(cache=None, report=None, budget=None):
+    """Analyses data/*.csv into the master file; returns how many master rows changed.
+
+    A long-running caller can pass its own AnalysisCache (kept open, so its
+    compiled matchers and fuzzy memo stay warm) and RunReport. With a
+    TimeBudget, the newest rows are read first (the most recently written
+    input first, each from its end), in batches of budget_batch_size, and no
+    new batch is started once it runs out. The
+    finished batches are committed to the cache and the master file, and the
+    next run picks up the rest. Derived files (near-duplicate list, Parquet
+    copy) are then left for the next run as well.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report = report or RunReport("rss-analysis")
+    budget = budget or TimeBudget()
+
+    master_file = os.path.join(output_dir, "all_merged.csv")
+    with report.stage("open stores"):
+        master_store = ArticleStore(
+            os.path.join(output_dir, "all_merged.sqlite"), master_file, table="merged",
+            fields=article_fields + ["SourceFile"] + analysis_columns, lineterminator="\n"
+        )
+        cube = RollupCube(os.path.join(output_dir, "rollup.sqlite"))
+        # A master table rebuilt from an edited CSV invalidates the counts as well.
+        if master_store.rebuilt or len(cube) != len(master_store):
+            cube.rebuild(master_store.rows())
+        duplicates_db = os.path.join(output_dir, "duplicates.sqlite")
+        duplicates = DuplicateIndex(duplicates_db)
+        own_cache = cache is None
+        if own_cache:
+            cache = AnalysisCache(os.path.join(output_dir, "analysis_cache.sqlite"), diff_threshold)
+        cache.stats = dict.fromkeys(cache.stats, 0)
+        comparisons_before = cache.comparisons
+
+    csv_files = glob.glob(os.path.join(input_dir, "*.csv"))
+    if not csv_files:
+        raise FileNotFoundError(f"No CSV files found in {input_dir}")
+    if budget.limited:
+        csv_files.sort(key=os.path.getmtime, reverse=True)
+
+    groups = normalize_groups(term_groups)
+    lows = group_lows(groups)
+
+    out_path = os.path.join(output_dir, "merged_parsed_documents.csv")
+    tmp_path = out_path + ".tmp"
     unique_cols = ["Title", "Date", "Location", "URL"]
-    df_combined = df_combined.drop_duplicates(subset=unique_cols, keep="first")
-else:
-    df_combined = parsed
+    parsed_keys = set()
+    added_urls = set()
+    changed = []
+    dropped = []
+    written = False
+    reindexed = False
+    added = 0
+    new_pairs = 0
+
+    # One batch of input rows is in memory at a time; only the rows that need a
+    # master revision are kept until the end.
+    size = budget_batch_size if budget.limited else batch_size
+    for df in read_batches(csv_files, size, newest_first=budget.limited):
+        if budget.expired():
+            print("Time budget used up, the remaining rows are analysed by the next run.")
+            break
+        report.count("documents", len(df))
+        # The master keeps the copy of an article it saw first. When this input
+        # differs from it, the row is evaluated from the stored copy by the
+        # master pass below, so the analysis columns match the stored text and
+        # the cache does not alternate between two texts for one URL.
+        df = df[~_diverged(df, master_store)]
+        if df.empty:
+            continue
+        original = joined_text(df)
+        df_text = original.str.lower()
+        with report.stage("term lookup"), report.profile():
+            forms, recomputed = cache.lookup(df['URL'], df_text, lows)
+            cache.commit()
+        recomputed = pd.Series(recomputed, index=df.index)
+        report.count("recomputed", int(recomputed.sum()))
+        # New or edited articles go into the near-duplicate index as well.
+        with report.stage("near-duplicate index"):
+            indexed = df['URL'].notna() & ~df['URL'].isin(duplicates.current(df['URL'], original))
+            if indexed.any():
+                new_pairs += len(duplicates.add(df[indexed].fillna('').to_dict("records")))
+                reindexed = True
+        if not recomputed.any():
+            continue
+
+        with report.stage("extract columns"):
+            df_new = df[recomputed].copy()
+            columns = columns_from_forms(
+                df_text[recomputed], df_new['Date'], [f for f, r in zip(forms, recomputed) if r], groups,
+                original[recomputed],
+            )
+            for col in analysis_columns:
+                df_new[col] = columns[col]
+
+            parsed = df_new[df_new['RightWingRelated'] == True].copy()
+            append_csv(parsed, tmp_path, first=not written)
+            written = True
+
+        if 'Topic' in parsed.columns:
+            parsed = parsed.drop(columns=['Topic'])
+
+        parsed = parsed.drop_duplicates(subset=unique_cols, keep="first")
+        keys = list(parsed[unique_cols].itertuples(index=False, name=None))
+        parsed = parsed[[key not in parsed_keys for key in keys]]
+        parsed_keys.update(keys)
+        rows = _csv_rows(parsed)
+
+        changed.extend(_revisions(rows, master_store, added_urls))
+        dropped.extend(
+            url for url in df_new.loc[df_new['RightWingRelated'] == False, 'URL']
+            if isinstance(url, str) and url not in added_urls and master_store.seen(url)
+        )
+
+        new_rows = [row for row in rows if not master_store.seen(row["URL"])]
+        added_urls.update(row["URL"] for row in new_rows)
+        with report.stage("master update"):
+            added += master_store.save(new_rows)
+            cube.update(new_rows)
+
+    # Master rows whose input is gone (e.g. archive rows merged in earlier) or
+    # differs from the stored copy are evaluated from their stored text, so
+    # rule edits reach them as well. Every master row is looked up, one chunk
+    # at a time; rows the input loop just evaluated are cache hits.
+    with report.stage("master re-evaluation"):
+        reevaluated = revised = 0
+        rows = master_store.rows()
+        while True:
+            if budget.expired():
+                print("Time budget used up, the remaining master rows are re-evaluated by the next run.")
+                break
+            chunk = list(itertools.islice(rows, size))
+            if not chunk:
+                break
+            chunk = pd.DataFrame(chunk, columns=master_store.fields)
+            chunk_original = joined_text(chunk)
+            chunk_text = chunk_original.str.lower()
+            forms, recomputed = cache.lookup(chunk['URL'], chunk_text, lows)
+            cache.commit()
+            recomputed = pd.Series(recomputed, index=chunk.index, dtype=bool)
+            if not recomputed.any():
+                continue
+            df_old = chunk[recomputed].copy()
+            columns = columns_from_forms(
+                chunk_text[recomputed], df_old['Date'], [f for f, r in zip(forms, recomputed) if r], groups,
+                chunk_original[recomputed],
+            )
+            for col in analysis_columns:
+                df_old[col] = columns[col]
+            revisions = _revisions(_csv_rows(df_old[df_old['RightWingRelated'] == True]), master_store, ())
+            changed.extend(revisions)
+            dropped.extend(df_old.loc[df_old['RightWingRelated'] == False, 'URL'])
+            reevaluated += len(df_old)
+            revised += len(revisions)
+        rows.close()
+        if reevaluated:
+            print(f"Re-evaluated {reevaluated} master rows from their stored copy, {revised} changed.")
+
+    print(f"Analysis cache: {cache.stats}")
+    documents = report.counters["documents"]
+    comparisons = cache.comparisons - comparisons_before
+    report.count("fuzzy_comparisons", comparisons)
+    report.set("fuzzy_comparisons_per_document", comparisons / documents if documents else 0)
+    report.set("cache", cache.stats)
+    report.set("time_budget", budget.as_dict())
+    if own_cache:
+        cache.close()
+
+    # A list skipped for the budget is older than the index, so the next run writes it.
+    duplicates_file = os.path.join(output_dir, "near_duplicates.csv")
+    stale = not os.path.exists(duplicates_file) or (
+        os.path.getmtime(duplicates_db) > os.path.getmtime(duplicates_file)
+    )
+    if (reindexed or stale) and not budget.expired():
+        with report.stage("near-duplicate index"):
+            write_clusters(duplicates, duplicates_file)
+        print(f"Near-duplicate index: {len(duplicates)} articles, {new_pairs} new pairs, "
+              f"{len(duplicates.clusters())} clusters listed in {duplicates_file}")
+    duplicates.close()
+
+    if not written and not (changed or dropped):
+        print("No new or changed rows to parse.")
+        if not budget.expired():
+            with report.stage("columnar copy"):
+                export_parquet(master_file, os.path.join(output_dir, "all_merged.parquet"))
+        master_store.close()
+        cube.close()
+        report.write()
+        return 0
+
+    if written:
+        os.replace(tmp_path, out_path)
+        print(f"Saved parsed data to: {out_path}")
+
+    if changed or dropped:
+        with report.stage("master update"):
+            master_store.revise(changed, dropped)
+            cube.update(master_store.get(row["URL"]) for row in changed)
+            cube.remove(dropped)
+        print(f"Re-evaluated master rows: {len(changed)} changed, {len(dropped)} no longer related.")
+
+    print(f"Updated master file: {master_file} ({added} new, total rows: {len(master_store)})")
+    report.count("master_added", added)
+    report.count("master_changed", len(changed))
+    report.count("master_dropped", len(dropped))
+    if not budget.expired():
+        with report.stage("columnar copy"):
+            export_parquet(master_file, os.path.join(output_dir, "all_merged.parquet"))
+    master_store.close()
+    cube.close()
+    report.write()
+    return added + len(changed) + len(dropped)
+
 
-df_combined.to_csv(master_file, index=False)
-print(f"Updated master file: {master_file} (Total rows: {len(df_combined)})")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse the scraped RSS articles into output/all_merged.csv.")
+    parser.add_argument("--time-budget", type=float, metavar="MINUTES",
+                        help="start no new batch after this many minutes and leave the rest for the next run")
+    args = parser.parse_args()
+    main(budget=TimeBudget.from_minutes(args.time_budget))
@@ -0,0 +1,72 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import analysis
+import export
+from common.cache import AnalysisCache
+from common.feeds import FeedSchedule
+from common.report import RunReport
+from common.rules import diff_threshold
+from rss import RssScraper, feed_urls
+
+schedule_path = 'data/feed_schedule.json'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep polling the RSS feeds, analysing and exporting new articles as they arrive."
+    )
+    parser.add_argument("--min-interval", type=float, default=5,
+                        help="shortest time between two polls of one feed, in minutes")
+    parser.add_argument("--max-interval", type=float, default=360,
+                        help="longest time between two polls of one feed, in minutes")
+    parser.add_argument("--cycles", type=int, default=0,
+                        help="stop after this many polling cycles (default: run until stopped)")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    schedule = FeedSchedule(schedule_path, min_interval=args.min_interval * 60,
+                            max_interval=args.max_interval * 60)
+    scraper = RssScraper(RunReport("rss-daemon"))
+    # Kept open for the whole run, so its compiled matchers and fuzzy memo stay warm.
+    cache = AnalysisCache(os.path.join(analysis.output_dir, "analysis_cache.sqlite"), diff_threshold)
+    cycles = 0
+
+    while not stop.is_set():
+        due = schedule.due(feed_urls, time.time())
+        if due:
+            report = RunReport("rss-daemon")
+            scraper.report = report
+            report.set("feeds_polled", len(due))
+            saved, entries = scraper.run(due)
+            now = time.time()
+            for feed_url, feed_entries in entries.items():
+                schedule.observe(feed_url, feed_entries, now)
+            schedule.save()
+            # Quiet cycles leave no report behind; the analysis writes the report of a busy one.
+            if saved:
+                analysis.main(cache=cache, report=report)
+                export.main()
+            cycles += 1
+            if args.cycles and cycles >= args.cycles:
+                break
+        next_poll = min(schedule.next_poll(feed_url) for feed_url in feed_urls)
+        wait = max(1.0, next_poll - time.time())
+        print(f"Next poll in {wait / 60:.1f} min.")
+        stop.wait(wait)
+
+    scraper.close()
+    cache.close()
+    print("Poller stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import export
+from common.cube import RollupCube
+
+master_file = os.path.join("output", "all_merged.csv")
+cube_path = os.path.join("output", "rollup.sqlite")
+static_dir = os.path.join("..", "..", "static", "data")
+
+# file name -> cube dimensions it is rolled up to
+cube_artifacts = {
+    "cube.json": ("month", "district", "keyword", "action", "gender"),
+    "cube-daily.json": ("day", "keyword"),
+}
+
+
+def main():
+    if export.brotli is None:
+        print("brotli is not installed, skipping .br files.")
+
+    changed = export.export_frontend(master_file, static_dir)
+
+    cube = RollupCube(cube_path)
+    with open(master_file, "r", newline="", encoding="utf-8") as f:
+        total = sum(1 for _ in csv.DictReader(f))
+    if len(cube) != total:
+        print("Rollup cube is out of date, rebuilding it from the master file.")
+        with open(master_file, "r", newline="", encoding="utf-8") as f:
+            cube.rebuild(csv.DictReader(f))
+    for name, by in cube_artifacts.items():
+        data = json.dumps(cube.artifact(by), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        changed += export.write_artifact(os.path.join(static_dir, name), data)
+    cube.close()
+
+    print(f"Exported frontend data to: {static_dir} ({changed} files changed)")
+    return changed
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
-import requests
-import feedparser
-from bs4 import BeautifulSoup
-import csv
+import argparse
+import json
 import os
+import sys
 import datetime
 from urllib.parse import urljoin
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.budget import TimeBudget
+from common.extractors import berlin_article, brandenburg_article
+from common.feeds import FeedState, poll_feed
+from common.fetch import HostLimiter, fetch_all, make_session, polite_get
+from common.report import RunReport
+from common.store import ArticleStore
+
 berlin_base_url = "https://www.berlin.de"
 brandenburg_base_url = "https://polizei.brandenburg.de"
 
@@ -36,120 +43,221 @@ feed_urls = [
 ]
 
 file_path = 'data/police_rss.csv'
-min_date = datetime.date(2016, 1, 1)  
-
-os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-existing_urls = set()
-existing_data = []
-if os.path.exists(file_path):
-    with open(file_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            existing_data.append(row)
-            existing_urls.add(row["URL"])
-
-session = requests.Session()
-session.headers.update({"User-Agent": "Mozilla/5.0"})
-
-def scrape_berlin_article(url):
-    try:
-        res = requests.get(url, timeout=30)
-        if res.status_code != 200:
+store_path = 'data/articles.sqlite'
+feed_state_path = 'data/feed_state.json'
+backlog_path = 'data/rss_backlog.json'
+min_date = datetime.date(2016, 1, 1)
+max_workers = 8
+per_host_interval = 0.5
+per_host_concurrency = 2
+article_batch_size = 2 * max_workers
+
+
+class RssScraper:
+    """Polls feeds and saves the new articles; keeps its session and stores open between polls.
+
+    `report` may be swapped between polls, e.g. for one report per cycle of
+    a long-running poller. Articles a time-budgeted run did not get to are
+    kept in data/rss_backlog.json and fetched first by the next run.
+    """
+
+    def __init__(self, report):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.report = report
+        self.store = ArticleStore(store_path, file_path, table="rss")
+        self.feed_state = FeedState(feed_state_path)
+        self.session = make_session(pool_size=max_workers)
+        self.session.hooks["response"].append(lambda res, *args, **kwargs: self.report.record_response(res))
+        self.limiter = HostLimiter(min_interval=per_host_interval, max_concurrent=per_host_concurrency)
+        self.backlog = []
+        if os.path.exists(backlog_path):
+            with open(backlog_path, "r", encoding="utf-8") as f:
+                self.backlog = json.load(f)
+
+    def scrape_article(self, item):
+        if item["is_berlin"]:
+            site, parse = "Berlin", berlin_article
+        elif item["is_brandenburg"]:
+            site, parse = "Brandenburg", brandenburg_article
+        else:
             return "", ""
-        soup = BeautifulSoup(res.text, "html.parser")
-        content = soup.find("div", class_="textile")
-        text = content.get_text(separator="\n", strip=True) if content else ""
-        location_tag = soup.find("p", class_="polizeimeldung", title="Ereignisort")
-        location = location_tag.get_text(strip=True) if location_tag else ""
-        return text, location
-    except Exception as e:
-        print(f"Berlin article fetch failed: {e}")
-        return "", ""
-
-def scrape_brandenburg_article(url):
-    try:
-        res = session.get(url, timeout=30)
-        if res.status_code != 200:
+        try:
+            res = polite_get(self.session, self.limiter, item["URL"])
+            if res.status_code != 200:
+                return "", ""
+            with self.report.stage("parse articles"):
+                return parse(res.text)
+        except Exception as e:
+            print(f"{site} article fetch failed: {e}")
             return "", ""
-        soup = BeautifulSoup(res.text, 'html.parser')
-        content = soup.find("div", class_="pbb-article-text")
-        text = content.get_text(separator="\n", strip=True) if content else ""
-        ort_tag = soup.find("p", class_="pbb-ort")
-        landkreis_tag = soup.find("p", class_="pbb-landkreis")
-        location = ""
-        if ort_tag:
-            location = ort_tag.get_text(strip=True)
-        if landkreis_tag:
-            location += ", " + landkreis_tag.get_text(strip=True) if location else landkreis_tag.get_text(strip=True)
-        return text, location
-    except Exception as e:
-        print(f"Brandenburg article fetch failed: {e}")
-        return "", ""
-
-new_rows = []
-
-for feed_url in feed_urls:
-    print("Fetching RSS:", feed_url)
-    feed = feedparser.parse(feed_url)
-    is_berlin = 'berlin.de' in feed_url
-    is_brandenburg = 'brandenburg.de' in feed_url
-    base_url = berlin_base_url if is_berlin else brandenburg_base_url
-
-    for entry in feed.entries:
-        url = entry.get("link")
-        if not url.startswith("http"):
-            url = urljoin(base_url, url)
-        if url in existing_urls:
-            print(f"Already saved: {url}")
-            continue
-
-        pub_date = entry.get("published_parsed")
-        if pub_date:
-            article_date = datetime.date(pub_date.tm_year, pub_date.tm_mon, pub_date.tm_mday)
-            if article_date < min_date:
+
+    def pending(self, feed_url, entries, queued_urls):
+        is_berlin = 'berlin.de' in feed_url
+        is_brandenburg = 'brandenburg.de' in feed_url
+        base_url = berlin_base_url if is_berlin else brandenburg_base_url
+        items = []
+
+        for entry in entries:
+            url = entry.get("link")
+            if not url.startswith("http"):
+                url = urljoin(base_url, url)
+            if url in queued_urls or self.store.seen(url):
+                print(f"Already saved: {url}")
                 continue
-            date_str = article_date.strftime("%d.%m.%Y")
-        else:
-            date_str = ""
-
-        title = entry.get("title", "")
-        summary = entry.get("summary", "")
-
-        location = ""
-        t_title = title
-        if ": " in title:
-            parts = title.split(": ", 1)
-            if "," in parts[0]:
-                location = parts[0].strip()
-                t_title = parts[1].strip()
-
-        article_text, article_location = ("", "")
-        if is_berlin:
-            article_text, article_location = scrape_berlin_article(url)
-        elif is_brandenburg:
-            article_text, article_location = scrape_brandenburg_article(url)
-
-        final_text = article_text if article_text else summary
-        final_location = article_location if article_location else location
-
-        new_rows.append({
-            "Title": t_title,
-            "Date": date_str,
-            "Location": final_location,
-            "Text": final_text,
-            "URL": url
-        })
-        existing_urls.add(url)
-
-print(f"\nFetched {len(new_rows)} new articles.")
-
-combined = existing_data + new_rows
-if len(new_rows) > 0:
-    with open(file_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=["Title", "Date", "Location", "Text", "URL"])
-        writer.writeheader()
-        for r in combined:
-            writer.writerow(r)
-
-print(f"{len(new_rows)} new articles saved.")
+
+            pub_date = entry.get("published_parsed")
+            if pub_date:
+                article_date = datetime.date(pub_date.tm_year, pub_date.tm_mon, pub_date.tm_mday)
+                if article_date < min_date:
+                    continue
+                date_str = article_date.strftime("%d.%m.%Y")
+            else:
+                date_str = ""
+
+            title = entry.get("title", "")
+            summary = entry.get("summary", "")
+
+            location = ""
+            t_title = title
+            if ": " in title:
+                parts = title.split(": ", 1)
+                if "," in parts[0]:
+                    location = parts[0].strip()
+                    t_title = parts[1].strip()
+
+            items.append({
+                "Title": t_title,
+                "Date": date_str,
+                "Location": location,
+                "Summary": summary,
+                "URL": url,
+                "Feed": feed_url,
+                "is_berlin": is_berlin,
+                "is_brandenburg": is_brandenburg,
+            })
+            queued_urls.add(url)
+        return items
+
+    def pending_backlog(self, queued_urls):
+        """Articles a previous run left over that are still not saved."""
+        items = []
+        for item in self.backlog:
+            if item["URL"] in queued_urls or self.store.seen(item["URL"]):
+                continue
+            items.append(item)
+            queued_urls.add(item["URL"])
+        return items
+
+    def expected_value(self, item):
+        """Sort key for pending articles: newest first, then from the feeds with most new entries."""
+        try:
+            day = datetime.datetime.strptime(item["Date"], "%d.%m.%Y").date()
+        except ValueError:
+            day = datetime.date.min
+        return day, self.feed_state.entries_per_poll(item.get("Feed")) or 0
+
+    def save_backlog(self, items):
+        self.backlog = items
+        tmp_path = backlog_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, backlog_path)
+
+    def run(self, feeds, budget=None):
+        """Polls feeds, fetches and saves their new articles; returns (saved, {feed url: new entries}).
+
+        Feeds are polled highest yield first and articles fetched by
+        expected_value, a batch at a time, each batch saved on its own. When
+        the budget runs out, unpolled feeds keep their state and unfetched
+        articles go to the backlog.
+        """
+        report = self.report
+        budget = budget or TimeBudget()
+
+        def poll(feed_url):
+            return poll_feed(self.session, self.limiter, feed_url, self.feed_state.get(feed_url))
+
+        def feed_yield(feed_url):
+            # Feeds never polled have no yield yet and go first.
+            entries = self.feed_state.entries_per_poll(feed_url)
+            return float("inf") if entries is None else entries
+
+        ranked = sorted(feeds, key=feed_yield, reverse=True)
+        polls = {}
+        with report.stage("poll feeds"):
+            for start in range(0, len(ranked), max_workers):
+                if budget.expired():
+                    print(f"Time budget used up, {len(ranked) - start} feeds left for the next run.")
+                    report.count("feeds_skipped", len(ranked) - start)
+                    break
+                batch = ranked[start:start + max_workers]
+                polls.update(zip(batch, fetch_all(batch, poll, max_workers=max_workers)))
+
+        queued_urls = set()
+        pending = self.pending_backlog(queued_urls)
+        for feed_url, (entries, _) in polls.items():
+            print(f"Fetched RSS: {feed_url} ({len(entries)} new entries)")
+            report.count("feed_entries", len(entries))
+            pending.extend(self.pending(feed_url, entries, queued_urls))
+        pending.sort(key=self.expected_value, reverse=True)
+
+        print(f"Fetching {len(pending)} article bodies with {max_workers} workers...")
+        saved = 0
+        fetched = 0
+        while fetched < len(pending) and not budget.expired():
+            batch = pending[fetched:fetched + article_batch_size]
+            with report.stage("fetch articles"):
+                bodies = fetch_all(batch, self.scrape_article, max_workers=max_workers)
+            fetched += len(batch)
+
+            new_rows = []
+            for item, (article_text, article_location) in zip(batch, bodies):
+                new_rows.append({
+                    "Title": item["Title"],
+                    "Date": item["Date"],
+                    "Location": article_location if article_location else item["Location"],
+                    "Text": article_text if article_text else item["Summary"],
+                    "URL": item["URL"]
+                })
+            with report.stage("save"):
+                saved += self.store.save(new_rows)
+        report.count("articles_fetched", fetched)
+
+        print(f"\nFetched {fetched} new articles.")
+        if fetched < len(pending):
+            print(f"Time budget used up, {len(pending) - fetched} articles left for the next run.")
+
+        # The backlog is written before the feed state, so an entry the feed
+        # state no longer returns is never lost.
+        with report.stage("save"):
+            self.save_backlog(pending[fetched:])
+            for feed_url, (entries, state) in polls.items():
+                self.feed_state.update(feed_url, dict(state, entries_per_poll=self.feed_state.observed(feed_url, entries)))
+            self.feed_state.save()
+
+        print(f"{saved} new articles saved.")
+        report.count("articles_saved", saved)
+        report.count("articles_carried_over", len(self.backlog))
+        report.set("time_budget", budget.as_dict())
+        return saved, {feed_url: entries for feed_url, (entries, _) in polls.items()}
+
+    def close(self):
+        self.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the Berlin and Brandenburg police RSS feeds.")
+    parser.add_argument("--time-budget", type=float, metavar="MINUTES",
+                        help="stop fetching after this many minutes and leave the rest for the next run")
+    args = parser.parse_args()
+
+    report = RunReport("rss-scrape")
+    scraper = RssScraper(report)
+    scraper.run(feed_urls, TimeBudget.from_minutes(args.time_budget))
+    scraper.close()
+    report.write()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,37 @@ export function highlightTerms(text, terms) {
   );
   return text.replace(re, (match) => `<span class="highlight">${match}</span>`);
 }
+
+const SPAN_KINDS = { k: "keyword", a: "action", t: "time", y: "age", g: "gender" };
+
+// Decodes the Highlights column written by the analysis: spans of
+// Title + " " + Text as <kind><gap since previous end>.<length>, e.g. "k12.7t30.9".
+export function decodeHighlights(encoded) {
+  const spans = [];
+  let end = 0;
+  for (const [, kind, gap, length] of String(encoded || "").matchAll(/([a-z])(\d+)\.(\d+)/g)) {
+    const start = end + Number(gap);
+    end = start + Number(length);
+    spans.push({ start, end, kind: SPAN_KINDS[kind] });
+  }
+  return spans;
+}
+
+// Wraps precomputed spans in <span class="highlight {kind}">. `offset` is
+// where `text` starts in Title + " " + Text (0 for the title,
+// title.length + 1 for the text); spans outside it are ignored.
+export function highlightSpans(text, spans, offset = 0) {
+  if (!text) return text;
+  const esc = (s) => s.replace(/[&<>"]/g, (c) => `&#${c.charCodeAt(0)};`);
+  let html = "";
+  let pos = 0;
+  for (const { start, end, kind } of spans) {
+    const from = start - offset;
+    const to = end - offset;
+    if (from < pos || to > text.length) continue;
+    html += esc(text.slice(pos, from));
+    html += `<span class="highlight ${kind}">${esc(text.slice(from, to))}</span>`;
+    pos = to;
+  }
+  return html + esc(text.slice(pos));
+}